@@ -0,0 +1,160 @@
+"""Анализ генофонда популяции: разнообразие геномов, частоты генов, кланы.
+
+Геномы собираются в матрицу (N, 64) uint8, и все метрики считаются
+векторно над ней. Если клеток больше sample_size, берётся случайная
+выборка — метрики выборки несмещённо оценивают метрики популяции.
+Выборка использует свой генератор и не трогает world.rng, так что
+анализ не меняет ход симуляции.
+
+Сбор выборки дёшев и делается в потоке, владеющем миром; расчёт
+отчёта BackgroundAnalysis выполняет в отдельном потоке, поэтому
+окно запрашивает анализ, не пропуская кадров.
+"""
+import concurrent.futures
+
+import numpy as np
+
+from cell_type import CellType
+from genome_program import ACTION_TABLE, GENOME_LENGTH, Action
+
+SAMPLE_SIZE = 10000
+GENE_VALUES = GENOME_LENGTH + 1  # Гены принимают значения 0..64
+# Корзины размеров кланов: 1, 2-3, 4-7, ... (по степеням двойки)
+CLAN_SIZE_BUCKETS = 16
+
+ACTIONS = np.array(ACTION_TABLE, dtype=np.int8)  # [тип клетки, ген] -> Action
+
+
+def sample_genomes(world, sample_size=SAMPLE_SIZE, seed=None):
+    """Выборка клеток мира: геномы (n, 64), типы и кланы, плюс размеры всех кланов."""
+    rng = np.random.default_rng(seed)
+    if hasattr(world, 'cells'):
+        cells = [cell for cell in world.cells if cell is not None]
+        population = len(cells)
+        if population > sample_size:
+            cells = [cells[i] for i in rng.choice(population, sample_size, replace=False).tolist()]
+        genomes = np.frombuffer(b''.join(cell.genome for cell in cells), dtype=np.uint8)
+        cell_type = np.fromiter((cell.cell_type.value for cell in cells), dtype=np.int8, count=len(cells))
+        clan_id = np.fromiter((cell.clan_id for cell in cells), dtype=np.int64, count=len(cells))
+    else:
+        population = world.size
+        chosen = slice(0, population)
+        if population > sample_size:
+            chosen = np.sort(rng.choice(population, sample_size, replace=False))
+        genomes = world.genomes[chosen].copy()
+        cell_type = world.cell_type[chosen].copy()
+        clan_id = world.clan_id[chosen].copy()
+    clan_sizes = np.fromiter(world.stats.clan_sizes.values(), dtype=np.int64)
+    return {
+        'tick': world.tick,
+        'population': population,
+        'genomes': genomes.reshape(-1, GENOME_LENGTH),
+        'cell_type': cell_type,
+        'clan_id': clan_id,
+        'clan_sizes': clan_sizes,
+    }
+
+
+def gene_frequencies(genomes):
+    """Доли значений генов по позициям: массив (64 позиции, 65 значений)."""
+    n = len(genomes)
+    positions = np.arange(GENOME_LENGTH) * GENE_VALUES
+    counts = np.bincount((genomes + positions).ravel(), minlength=GENOME_LENGTH * GENE_VALUES)
+    return counts.reshape(GENOME_LENGTH, GENE_VALUES) / max(n, 1)
+
+
+def distinct_genomes(genomes):
+    """Число различных геномов: строки матрицы сравниваются как 8 слов по 64 бита."""
+    if not len(genomes):
+        return 0
+    words = np.ascontiguousarray(genomes).view(np.uint64)
+    return len(np.unique(words, axis=0))
+
+
+def hamming_diversity(frequencies, n):
+    """Средняя доля различающихся генов у двух случайных разных клеток.
+
+    Вместо N^2 попарных сравнений: на позиции две клетки совпадают с
+    вероятностью sum(p^2), поправка n / (n - 1) исключает пары клетки с собой."""
+    if n < 2:
+        return 0.0
+    match = (frequencies ** 2).sum(axis=1)
+    return float(((1 - match) * n / (n - 1)).mean())
+
+
+def action_mix(genomes, cell_type):
+    """Доли действий, которые кодируют гены выборки: {имя действия: доля}."""
+    actions = ACTIONS[cell_type[:, None].astype(np.intp), genomes]
+    counts = np.bincount(actions.ravel(), minlength=len(Action))
+    total = max(int(counts.sum()), 1)
+    return {action.name: float(counts[action] / total) for action in Action}
+
+
+def clan_size_distribution(clan_sizes):
+    """Число кланов по корзинам размера 1, 2-3, 4-7, ...; последняя — всё, что больше."""
+    if not len(clan_sizes):
+        return np.zeros(CLAN_SIZE_BUCKETS, dtype=np.int64)
+    buckets = np.minimum(np.log2(clan_sizes).astype(np.intp), CLAN_SIZE_BUCKETS - 1)
+    return np.bincount(buckets, minlength=CLAN_SIZE_BUCKETS)
+
+
+def analyse(sample):
+    """Отчёт по выборке sample_genomes."""
+    genomes = sample['genomes']
+    n = len(genomes)
+    frequencies = gene_frequencies(genomes)
+    clan_sizes = sample['clan_sizes']
+    type_counts = np.bincount(sample['cell_type'], minlength=len(CellType))
+    return {
+        'tick': sample['tick'],
+        'population': sample['population'],
+        'sampled': n,
+        'types': {cell_type.name: int(type_counts[cell_type.value]) for cell_type in CellType},
+        'distinct_genomes': distinct_genomes(genomes),
+        'diversity': hamming_diversity(frequencies, n),
+        'gene_frequencies': frequencies,
+        # Доля самого частого значения на каждой позиции: 1 — позиция одинакова у всех
+        'conservation': frequencies.max(axis=1),
+        'action_mix': action_mix(genomes, sample['cell_type']),
+        'clans': len(clan_sizes),
+        'sampled_clans': len(np.unique(sample['clan_id'])),
+        'largest_clan': int(clan_sizes.max()) if len(clan_sizes) else 0,
+        'clan_size_distribution': clan_size_distribution(clan_sizes),
+    }
+
+
+def analyse_world(world, sample_size=SAMPLE_SIZE, seed=None):
+    return analyse(sample_genomes(world, sample_size, seed))
+
+
+class BackgroundAnalysis:
+    """Анализ по запросу: выборка в потоке вызова, расчёт отчёта в фоновом потоке."""
+
+    def __init__(self, sample_size=SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self.report = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='analytics')
+        self._future = None
+
+    @property
+    def busy(self):
+        return self._future is not None
+
+    def request(self, world):
+        """Запускает анализ мира, если предыдущий уже готов; возвращает, запущен ли он."""
+        if self._future is not None:
+            return False
+        self._future = self._executor.submit(analyse, sample_genomes(world, self.sample_size))
+        return True
+
+    def poll(self):
+        """Свежий отчёт, если расчёт закончился с прошлого вызова, иначе None."""
+        future = self._future
+        if future is None or not future.done():
+            return None
+        self._future = None
+        self.report = future.result()
+        return self.report
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,453 @@
+"""Альтернативный движок симуляции: состояние мира в массивах NumPy.
+
+Сетка — один целочисленный массив занятости (индекс клетки или -1),
+свойства клеток — параллельные массивы, геномы — матрица (N, 64) uint8.
+Тик выполняется фазами над всеми клетками сразу, без вызовов методов
+для каждой клетки.
+
+Отличия от поклеточного World.update: все клетки принимают решения по
+состоянию мира на начало тика, а конфликты (два хода в одну клетку, две
+атаки на одну жертву) разрешаются в пользу клетки с меньшим индексом —
+то есть той, которая в World.update походила бы раньше.
+"""
+import numpy as np
+
+from cell_type import CellType
+from config import *
+from genome_program import ACTION_TABLE as GENOME_ACTION_TABLE, GENOME_LENGTH, Action, turn_for_gene
+from population_stats import PopulationStats
+from seeding import plan_population
+from snapshot import load_world, save_world
+from world_random import WorldRandom
+
+EMPTY = -1
+RESERVED = -2  # Клетка занята под потомка, который появится в конце тика
+
+# Смещения для направлений Direction.NORTH ... Direction.NORTHWEST
+DIRECTION_DX = np.array([0, 1, 1, 1, 0, -1, -1, -1], dtype=np.int32)
+DIRECTION_DY = np.array([-1, -1, 0, 1, 1, 1, 0, -1], dtype=np.int32)
+
+# Таблица [тип клетки, ген] -> действие, общая с Cell
+ACTION_TABLE = np.array(GENOME_ACTION_TABLE, dtype=np.uint8)
+
+# Поворот по значению гена, следующего за геном поворота
+TURN_TABLE = np.array([turn_for_gene(gene) for gene in range(GENOME_LENGTH + 1)], dtype=np.int8)
+
+
+def _first_claims(claimants, targets):
+    """Оставляет для каждой цели только претендента с наименьшим индексом.
+
+    claimants должны быть отсортированы по возрастанию."""
+    _, first = np.unique(targets, return_index=True)
+    winners = np.zeros(len(claimants), dtype=bool)
+    winners[first] = True
+    return winners
+
+
+def _positions(cells, subset):
+    """Позиции элементов subset в отсортированном массиве cells; -1 — элемента там нет."""
+    positions = np.searchsorted(cells, subset)
+    positions[positions == len(cells)] = 0
+    return np.where(cells[positions] == subset, positions, -1)
+
+
+def _is_relative(genomes, a, b):
+    """Сравнивает геномы попарно, по 8 байт за раз."""
+    genomes = genomes.view(np.uint64)
+    return np.all(genomes[a] == genomes[b], axis=1)
+
+
+def act(world, cells):
+    """Один тик для клеток cells (отсортированные индексы) мира world.
+
+    Остальные клетки в этом вызове не действуют, но могут быть жертвами,
+    получателями энергии и препятствиями. Массивы мира изменяются на месте,
+    сетка сразу отражает ходы и гибель, а клетки, занятые под потомков,
+    помечаются RESERVED. Погибшие отмечаются в world.alive.
+    Возвращает родителей и энергию потомков; их рождение — дело вызывающего.
+
+    world — ArrayWorld или любой объект с теми же массивами, например
+    состояние в разделяемой памяти у процесса параллельного тика."""
+    x, y, energy = world.x, world.y, world.energy
+    direction, step = world.direction, world.genome_step
+    cell_type, clan_id, genomes = world.cell_type, world.clan_id, world.genomes
+    alive, grid, config = world.alive, world.grid, world.config
+    max_energy = world.max_energy
+
+    # Фаза 1: гибель от голода, старости и переизбытка энергии
+    dead = (energy[cells] <= 0) | (world.age[cells] >= config.max_age) | (energy[cells] > max_energy[cell_type[cells]])
+    grid[x[cells[dead]], y[cells[dead]]] = EMPTY
+    alive[cells[dead]] = False
+
+    # Фаза 2: выбор гена и действия
+    gene = genomes[cells, step[cells]]
+    action = ACTION_TABLE[cell_type[cells], gene]
+    action[dead] = Action.NONE
+    jump = gene.astype(np.int32)
+
+    # Клетка впереди (по состоянию на начало тика)
+    ahead_x = x[cells] + DIRECTION_DX[direction[cells]]
+    ahead_y = y[cells] + DIRECTION_DY[direction[cells]]
+    if world.config.toroidal:
+        ahead_x %= world.width
+        ahead_y %= world.height
+        valid = np.ones(len(cells), dtype=bool)
+    else:
+        valid = (ahead_x >= 0) & (ahead_x < world.width) & (ahead_y >= 0) & (ahead_y < world.height)
+    target = np.full(len(cells), EMPTY, dtype=np.int32)
+    target[valid] = grid[ahead_x[valid], ahead_y[valid]]
+    occupied = target >= 0
+    empty_ahead = valid & (target == EMPTY)
+
+    # Осмотр
+    acting = np.flatnonzero(action == Action.LOOK)
+    if len(acting):
+        result = np.where(valid[acting], 1, 2)
+        seen = acting[occupied[acting]]
+        other = target[seen]
+        code = np.where(cell_type[other] == CellType.PHOTOSYNTHETIC.value, 3, 4)
+        code[_is_relative(genomes, cells[seen], other)] = 5
+        result[occupied[acting]] = code
+        jump[acting] = result
+
+    # Поворот по значению следующего гена
+    acting = np.flatnonzero(action == Action.TURN)
+    if len(acting):
+        turning = cells[acting]
+        next_gene = genomes[turning, (step[turning].astype(np.int32) + 1) % GENOME_LENGTH]
+        direction[turning] = (direction[turning] + TURN_TABLE[next_gene]) % 8
+        jump[acting] = 2
+
+    # Фотосинтез
+    acting = np.flatnonzero(action == Action.PHOTOSYNTHESIS)
+    if len(acting):
+        growing = cells[acting]
+        energy[growing] = np.minimum(energy[growing] + config.photosynthesis_energy, max_energy[cell_type[growing]])
+        jump[acting] = 1
+
+    # Фаза 3: атаки. Жертва достаётся атакующему с меньшим индексом,
+    # атакующий, которого раньше съел другой хищник, не действует.
+    moved = np.zeros(len(cells), dtype=bool)
+    acting = np.flatnonzero((action == Action.ATTACK) | (action == Action.BYTE))
+    jump[acting] = 1
+    acting = acting[occupied[acting]]
+    acting = acting[alive[target[acting]] & (clan_id[target[acting]] != clan_id[cells[acting]])]
+    if len(acting):
+        victims = target[acting]
+        attacked, first = np.unique(victims, return_index=True)
+        first_attacker = cells[acting[first]]
+        position = np.searchsorted(attacked, cells[acting])
+        position[position == len(attacked)] = 0
+        eaten_earlier = (attacked[position] == cells[acting]) & (first_attacker[position] < cells[acting])
+        acting = acting[~eaten_earlier]
+        victims = target[acting]
+        winners = _first_claims(acting, victims)
+        acting = acting[winners]
+        victims = victims[winners]
+
+        attackers = cells[acting]
+        share = np.where(action[acting] == Action.ATTACK, 0.8, 0.7)
+        energy[attackers] += energy[victims] * share
+        alive[victims] = False
+        grid[x[victims], y[victims]] = EMPTY
+        jump[acting] = 2
+
+        movers = acting[action[acting] == Action.ATTACK]
+        energy[cells[movers]] -= config.movement_cost
+        moved[movers] = True
+
+        # Съеденные клетки больше не действуют в этом тике
+        eaten = _positions(cells, victims)
+        eaten = eaten[eaten >= 0]
+        action[eaten] = Action.NONE
+        moved[eaten] = False
+
+    # Передача энергии
+    acting = np.flatnonzero(action == Action.GIVE_ENERGY)
+    if len(acting):
+        jump[acting] = 1
+        acting = acting[occupied[acting]]
+        receivers = target[acting]
+        accepted = alive[receivers] & (energy[receivers] < max_energy[cell_type[receivers]])
+        acting = acting[accepted]
+        receivers = receivers[accepted]
+        givers = cells[acting]
+        transferred = energy[givers] * 0.2
+        energy[givers] -= transferred
+        np.add.at(energy, receivers, transferred)
+        code = np.where(cell_type[receivers] == CellType.PHOTOSYNTHETIC.value, 2, 3)
+        code[_is_relative(genomes, givers, receivers)] = 4
+        jump[acting] = code
+
+    # Фаза 4: ходы и размножение претендуют на пустые клетки,
+    # каждая клетка достаётся претенденту с меньшим индексом.
+    own_energy = energy[cells]
+    moving = (action == Action.MOVE) & (own_energy >= config.movement_cost)
+    reproducing = (action == Action.REPRODUCE) & (own_energy >= config.reproduction_threshold) & ~(
+        (own_energy >= max_energy[cell_type[cells]]) & (cell_type[cells] == CellType.PHOTOSYNTHETIC.value))
+    jump[(action == Action.MOVE) | (action == Action.REPRODUCE)] = 1
+    claimants = np.flatnonzero((moving | reproducing) & empty_ahead)
+    parents = np.empty(0, dtype=np.int64)
+    birth_energy = np.empty(0, dtype=np.float64)
+    if len(claimants):
+        squares = ahead_x[claimants].astype(np.int64) * world.height + ahead_y[claimants]
+        claimants = claimants[_first_claims(claimants, squares)]
+
+        movers = claimants[moving[claimants]]
+        energy[cells[movers]] -= config.movement_cost
+        moved[movers] = True
+        jump[movers] = 2
+
+        births = claimants[reproducing[claimants]]
+        parents = cells[births]
+        # Разделяем энергию
+        birth_energy = energy[parents] // 2
+        energy[parents] = birth_energy
+        grid[ahead_x[births], ahead_y[births]] = RESERVED
+        jump[births] = 3
+
+    # Перемещения: сначала освобождаем старые клетки, потом занимаем новые
+    movers = np.flatnonzero(moved)
+    if len(movers):
+        moving_cells = cells[movers]
+        grid[x[moving_cells], y[moving_cells]] = EMPTY
+        x[moving_cells] = ahead_x[movers]
+        y[moving_cells] = ahead_y[movers]
+        grid[x[moving_cells], y[moving_cells]] = moving_cells
+
+    # Фаза 5: энергия, возраст, шаг генома
+    survivors = alive[cells]
+    living = cells[survivors]
+    energy[living] -= 1
+    world.age[living] += 1
+    step[living] = (step[living].astype(np.int32) + jump[survivors]) % GENOME_LENGTH
+
+    return parents, birth_energy
+
+
+class ArrayWorld:
+    def __init__(self, width, height, seed=None, config=None, capacity=1024):
+        self.width = width
+        self.height = height
+        self.config = config if config is not None else SimulationConfig()
+        self.max_energy = np.array([self.config.max_energy(cell_type) for cell_type in CellType], dtype=np.float64)
+        self.rng = WorldRandom(seed)
+        self.grid = self._new_array((width, height), np.int32)
+        self.grid.fill(EMPTY)
+        self.size = 0
+        self.tick = 0
+        self.births = 0
+        self.deaths = 0
+        self.tick_births = 0
+        self.tick_deaths = 0
+        self._stats = None
+        self._stats_tick = None
+        # Приёмник метрик по тикам (telemetry.TelemetrySink) или None
+        self.telemetry = None
+        # Сводки по плиткам для CameraRenderer (lod.ArrayTileAggregates) или None
+        self.tiles = None
+        # Кланы нумеруются подряд, идентификаторы не повторяются
+        self.next_clan_id = 1
+        self._allocate(capacity)
+
+    def _new_array(self, shape, dtype):
+        """Создаёт массив состояния; ParallelArrayWorld размещает их в разделяемой памяти."""
+        return np.zeros(shape, dtype=dtype)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.x = self._new_array(capacity, np.int32)
+        self.y = self._new_array(capacity, np.int32)
+        self.energy = self._new_array(capacity, np.float64)
+        self.age = self._new_array(capacity, np.int32)
+        self.direction = self._new_array(capacity, np.int8)
+        self.genome_step = self._new_array(capacity, np.uint8)
+        self.cell_type = self._new_array(capacity, np.int8)
+        self.clan_id = self._new_array(capacity, np.int64)
+        self.genomes = self._new_array((capacity, GENOME_LENGTH), np.uint8)
+        self.alive = self._new_array(capacity, bool)
+
+    def _reserve(self, count):
+        """Увеличивает ёмкость массивов, чтобы в них поместилось count клеток."""
+        if count <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < count:
+            capacity *= 2
+        old = self._columns()
+        self._allocate(capacity)
+        for name, values in old.items():
+            getattr(self, name)[:self.size] = values[:self.size]
+
+    def _columns(self):
+        return {
+            'x': self.x,
+            'y': self.y,
+            'energy': self.energy,
+            'age': self.age,
+            'direction': self.direction,
+            'genome_step': self.genome_step,
+            'cell_type': self.cell_type,
+            'clan_id': self.clan_id,
+            'genomes': self.genomes,
+            'alive': self.alive,
+        }
+
+    def __len__(self):
+        return self.size
+
+    def generate_genomes(self, count, cell_type):
+        genomes = self.rng.genomes(count)
+        if cell_type == CellType.PREDATOR:
+            # Заблокировать действие фотосинтеза для хищных клеток
+            genomes[:, 25:33] = 0
+        return genomes
+
+    def add_cell(self, x, y, cell_type=CellType.PHOTOSYNTHETIC, genome=None, clan_id=None):
+        """Добавляет клетку и возвращает её индекс или None, если место занято."""
+        if not self.is_valid_position(x, y) or self.grid[x, y] != EMPTY:
+            return None
+
+        self._reserve(self.size + 1)
+        i = self.size
+        self.x[i] = x
+        self.y[i] = y
+        self.energy[i] = self.config.cell_energy_start
+        self.age[i] = 0
+        self.direction[i] = self.rng.direction()
+        self.genome_step[i] = 0
+        self.cell_type[i] = cell_type.value
+        if clan_id is None:
+            clan_id = self.next_clan_id
+            self.next_clan_id += 1
+        self.clan_id[i] = clan_id
+        if genome is not None:
+            self.genomes[i] = np.frombuffer(bytes(genome), dtype=np.uint8)
+        else:
+            self.genomes[i] = np.frombuffer(self.rng.genome(), dtype=np.uint8)
+            if cell_type == CellType.PREDATOR:
+                # Заблокировать действие фотосинтеза для хищных клеток
+                self.genomes[i, 25:33] = 0
+        self.alive[i] = True
+        self.grid[x, y] = i
+        self.size += 1
+        if self.tiles is not None:
+            self.tiles.append(self, i, self.size)
+        return i
+
+    def populate(self, counts=None, density=None, genomes=None):
+        """Массово заселяет мир без коллизий; возвращает число созданных клеток (см. World.populate)."""
+        seeds = plan_population(self, counts, density, genomes)
+        count = len(seeds['x'])
+        self._reserve(self.size + count)
+        cells = slice(self.size, self.size + count)
+        self.x[cells] = seeds['x']
+        self.y[cells] = seeds['y']
+        self.energy[cells] = self.config.cell_energy_start
+        self.age[cells] = 0
+        self.direction[cells] = seeds['direction']
+        self.genome_step[cells] = 0
+        self.cell_type[cells] = seeds['cell_type']
+        self.clan_id[cells] = seeds['founder'] + self.next_clan_id
+        self.next_clan_id += seeds['founders']
+        self.genomes[cells] = seeds['genomes']
+        self.alive[cells] = True
+        self.grid[seeds['x'], seeds['y']] = np.arange(self.size, self.size + count, dtype=np.int32)
+        self.size += count
+        if self.tiles is not None:
+            self.tiles.append(self, self.size - count, self.size)
+        return count
+
+    def state_arrays(self):
+        """Представления массивов живых клеток (без копирования)."""
+        return {name: values[:self.size] for name, values in self._columns().items()
+                if name not in ('genomes', 'alive')}
+
+    @property
+    def stats(self):
+        """Счётчики популяции, пересчитываются векторно не чаще раза за тик."""
+        if self._stats_tick != (self.tick, self.size):
+            stats = PopulationStats.from_arrays(self.state_arrays())
+            stats.births = self.births
+            stats.deaths = self.deaths
+            stats.tick_births = self.tick_births
+            stats.tick_deaths = self.tick_deaths
+            self._stats = stats
+            self._stats_tick = (self.tick, self.size)
+        return self._stats
+
+    def save(self, path):
+        save_world(self, path)
+
+    @staticmethod
+    def load(path):
+        return load_world(path, engine='array')
+
+    def count_types(self):
+        counts = np.bincount(self.cell_type[:self.size], minlength=len(CellType))
+        return {cell_type: int(counts[cell_type.value]) for cell_type in CellType}
+
+    def is_valid_position(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def update(self):
+        n = self.size
+        births = act(self, np.arange(n))
+        self._finish_tick(n, births)
+
+    def _finish_tick(self, n, births):
+        """Рождает потомков, удаляет погибших и перестраивает сетку."""
+        parents, birth_energy = births
+        alive = self.alive[:n].copy()
+        self._spawn_offspring(parents, birth_energy)
+        if self.tiles is not None:
+            self.tiles.advance(self, n, alive)
+        self._compact(alive)
+        self.tick_births = len(parents)
+        self.tick_deaths = n - int(alive.sum())
+        self.births += self.tick_births
+        self.deaths += self.tick_deaths
+        self.tick += 1
+        if self.telemetry is not None:
+            self.telemetry.record(self)
+
+    def _mutate(self, genomes):
+        """С вероятностью config.mutation_chance меняет случайный ген в каждом геноме."""
+        mutated = np.flatnonzero(self.rng.generator.random(len(genomes)) < self.config.mutation_chance)
+        if len(mutated):
+            points = self.rng.generator.integers(0, GENOME_LENGTH, size=len(mutated))
+            genomes[mutated, points] = self.rng.generator.integers(1, GENOME_LENGTH + 1, size=len(mutated), dtype=np.uint8)
+        return genomes
+
+    def _spawn_offspring(self, parents, energy):
+        count = len(parents)
+        if count == 0:
+            return
+        n = self.size
+        self._reserve(n + count)
+        children = slice(n, n + count)
+        self.x[children] = (self.x[parents] + DIRECTION_DX[self.direction[parents]]) % self.width
+        self.y[children] = (self.y[parents] + DIRECTION_DY[self.direction[parents]]) % self.height
+        self.energy[children] = energy
+        self.age[children] = 0
+        self.direction[children] = self.rng.directions(count)
+        self.genome_step[children] = 0
+        self.cell_type[children] = self.cell_type[parents]
+        # У потомка такой же клан, как у родителя
+        self.clan_id[children] = self.clan_id[parents]
+        self.genomes[children] = self._mutate(self.genomes[parents].copy())
+        self.alive[children] = True
+        self.size += count
+
+    def _compact(self, alive):
+        """Удаляет мёртвые клетки, сохраняя порядок, и перестраивает сетку."""
+        keep = np.concatenate([alive, np.ones(self.size - len(alive), dtype=bool)])
+        if not keep.all():
+            survivors = np.flatnonzero(keep)
+            count = len(survivors)
+            for values in self._columns().values():
+                values[:count] = values[survivors]
+            self.size = count
+
+        self.grid.fill(EMPTY)
+        self.grid[self.x[:self.size], self.y[:self.size]] = np.arange(self.size, dtype=np.int32)
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""Пакетный запуск симуляции без pygame: N тиков с максимальной скоростью."""
+import argparse
+import time
+
+from world import World
+from array_world import ArrayWorld
+from parallel_world import ParallelArrayWorld
+from cell import CellType
+from snapshot import load_world
+from telemetry import TelemetrySink
+from streaming import DEFAULT_PORT, StreamServer
+from config import *
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Headless batch run of the simulation.')
+    parser.add_argument('--engine', choices=('objects', 'array'), default='objects',
+                        help='objects: World with a Cell per cell, array: NumPy ArrayWorld')
+    parser.add_argument('--ticks', type=int, default=1000, help='number of ticks to simulate')
+    parser.add_argument('--seed', type=int, default=None, help='random seed')
+    parser.add_argument('--width', type=int, default=PLAYGROUND_WIDTH // BLOCK_SIZE, help='grid width in blocks')
+    parser.add_argument('--height', type=int, default=PLAYGROUND_HEIGHT // BLOCK_SIZE, help='grid height in blocks')
+    parser.add_argument('--photosynthetic', type=int, default=3000, help='initial photosynthetic cells')
+    parser.add_argument('--predators', type=int, default=800, help='initial predator cells')
+    parser.add_argument('--toroidal', action='store_true', help='wrap the grid edges around instead of walls')
+    parser.add_argument('--chunk-size', type=int, default=None, metavar='N',
+                        help='objects engine only: allocate blocks in NxN chunks on demand (for huge sparse grids)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='array engine only: split each tick across this many processes')
+    parser.add_argument('--telemetry', metavar='PREFIX',
+                        help='stream per-tick metrics to PREFIX.00000.ndjson, PREFIX.00001.ndjson, ...')
+    parser.add_argument('--telemetry-every', type=int, default=1, metavar='N',
+                        help='record telemetry every N ticks')
+    parser.add_argument('--stream', type=int, nargs='?', const=DEFAULT_PORT, metavar='PORT',
+                        help=f'serve the run to stream_client.py viewers on this port (default {DEFAULT_PORT})')
+    parser.add_argument('--stream-host', default='127.0.0.1', help='address to bind the stream server to')
+    parser.add_argument('--load', metavar='PATH', help='resume from a snapshot instead of seeding a new world')
+    parser.add_argument('--save', metavar='PATH', help='write a snapshot after the run')
+    return parser.parse_args()
+
+
+def populate(world, photosynthetic, predators):
+    """Расселяет начальные клетки так же, как main.py."""
+    world.populate({CellType.PHOTOSYNTHETIC: photosynthetic, CellType.PREDATOR: predators})
+
+
+def main():
+    args = parse_args()
+
+    if args.load:
+        world = load_world(args.load, engine=args.engine, chunk_size=args.chunk_size, workers=args.workers)
+    else:
+        config = SimulationConfig(toroidal=args.toroidal)
+        if args.engine == 'array' and args.workers:
+            world = ParallelArrayWorld(width=args.width, height=args.height, seed=args.seed, config=config,
+                                       workers=args.workers)
+        elif args.engine == 'array':
+            world = ArrayWorld(width=args.width, height=args.height, seed=args.seed, config=config)
+        else:
+            world = World(width=args.width, height=args.height, seed=args.seed, config=config,
+                          chunk_size=args.chunk_size)
+
+    stream = None
+    # Поток сервера, файлы телеметрии и разделяемая память ParallelArrayWorld
+    # освобождаются и при ошибке или Ctrl-C посреди прогона
+    try:
+        if not args.load:
+            populate(world, args.photosynthetic, args.predators)
+
+        if args.telemetry:
+            world.telemetry = TelemetrySink(args.telemetry, every=args.telemetry_every)
+
+        if args.stream is not None:
+            stream = StreamServer(world, host=args.stream_host, port=args.stream).start()
+            print(f'streaming on {args.stream_host}:{stream.port}')
+
+        ticks = 0
+        start = time.perf_counter()
+        while ticks < args.ticks and len(world):
+            world.update()
+            if stream is not None:
+                stream.publish(world)
+            ticks += 1
+        elapsed = time.perf_counter() - start
+
+        if args.save:
+            world.save(args.save)
+        counts = world.count_types()
+        total = len(world)
+    finally:
+        if stream is not None:
+            stream.close()
+        if world.telemetry is not None:
+            world.telemetry.close()
+        if isinstance(world, ParallelArrayWorld):
+            world.close()
+
+    if world.telemetry is not None and world.telemetry.dropped:
+        print(f'telemetry: {world.telemetry.dropped} records dropped')
+    print(f'ticks: {ticks}')
+    print(f'elapsed: {elapsed:.3f} s')
+    print(f'ticks/sec: {ticks / elapsed if elapsed > 0 else 0.0:.1f}')
+    print(f'total: {total}')
+    print(f'photosynthetic: {counts[CellType.PHOTOSYNTHETIC]}')
+    print(f'predators: {counts[CellType.PREDATOR]}')
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
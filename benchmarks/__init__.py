@@ -0,0 +1,5 @@
+"""Замеры производительности симуляции на фиксированных сценариях.
+
+    python -m benchmarks run --output results.json
+    python -m benchmarks compare baseline.json results.json
+"""
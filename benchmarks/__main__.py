@@ -0,0 +1,111 @@
+"""Командная строка замеров: run пишет результаты в JSON, compare ищет регрессии."""
+import argparse
+import datetime
+import json
+import platform
+import sys
+
+import numpy as np
+
+from benchmarks.scenarios import select
+
+# Для каждой метрики: True — чем больше, тем лучше
+METRICS = {
+    'ticks_per_sec': True,
+    'tick_ms': False,
+    'draw_ms': False,
+    'stats_us': False,
+    'peak_bytes_per_cell': False,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Simulation benchmarks.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run the scenarios and write results as JSON')
+    run.add_argument('--engine', choices=('objects', 'array'), default='objects',
+                     help='objects: World with a Cell per cell, array: NumPy ArrayWorld')
+    run.add_argument('--scenario', action='append', metavar='NAME', help='run only these scenarios')
+    run.add_argument('--output', default='benchmark_results.json', help='results file')
+    run.add_argument('--baseline', metavar='PATH', help='compare the results against this file afterwards')
+    run.add_argument('--threshold', type=float, default=0.1, help='relative change counted as a regression')
+
+    compare = commands.add_parser('compare', help='compare results against a baseline')
+    compare.add_argument('baseline', help='baseline results file')
+    compare.add_argument('current', help='new results file')
+    compare.add_argument('--threshold', type=float, default=0.1, help='relative change counted as a regression')
+    return parser.parse_args()
+
+
+def run(args):
+    from benchmarks.measure import run_scenario
+
+    results = {}
+    for scenario in select(args.scenario):
+        print(f'{scenario.name}...', end=' ', flush=True)
+        results[scenario.name] = run_scenario(scenario, args.engine)
+        print(f'{results[scenario.name]["ticks_per_sec"]:.1f} ticks/sec')
+
+    report = {
+        'meta': {
+            'engine': args.engine,
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.platform(),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            return compare(json.load(f), report, args.threshold)
+    return 0
+
+
+def compare(baseline, current, threshold):
+    """Печатает изменение каждой метрики; возвращает 1, если есть регрессии."""
+    if baseline['meta']['engine'] != current['meta']['engine']:
+        print(f'warning: comparing engine {current["meta"]["engine"]} against {baseline["meta"]["engine"]}')
+
+    regressions = 0
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            print(f'{name}: no baseline')
+            continue
+        base = baseline['results'][name]
+        for metric, higher_is_better in METRICS.items():
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            mark = ''
+            if worse > threshold:
+                mark = '  REGRESSION'
+                regressions += 1
+            elif -worse > threshold:
+                mark = '  improved'
+            print(f'{name:20} {metric:20} {old:12.2f} -> {new:12.2f} {change:+8.1%}{mark}')
+
+    print(f'{regressions} regression(s) above {threshold:.0%}')
+    return 1 if regressions else 0
+
+
+def main():
+    args = parse_args()
+    if args.command == 'run':
+        return run(args)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    return compare(baseline, current, args.threshold)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
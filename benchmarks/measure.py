@@ -0,0 +1,91 @@
+"""Замеры одного сценария: скорость тика, время кадра, обновление панели, память."""
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+from array_world import ArrayWorld
+from batch import populate
+from config import BLOCK_SIZE
+from renderer import PixelRenderer
+from settings_ui import ControlPanel
+from world import World
+
+DRAW_FRAMES = 10
+
+
+def build(scenario, engine):
+    """Мир сценария после расселения и прогрева."""
+    world_class = ArrayWorld if engine == 'array' else World
+    width, height = scenario.size
+    world = world_class(width=width, height=height, seed=scenario.seed)
+    populate(world, scenario.photosynthetic, scenario.predators)
+    for _ in range(scenario.warmup):
+        world.update()
+    return world
+
+
+def measure_updates(world, panel, ticks):
+    """Тики мира и обновление панели после каждого из них, как в главном цикле."""
+    update_time = 0.0
+    stats_time = 0.0
+    done = 0
+    while done < ticks and len(world):
+        start = time.perf_counter()
+        world.update()
+        middle = time.perf_counter()
+        panel.update_stats(world)
+        stats_time += time.perf_counter() - middle
+        update_time += middle - start
+        done += 1
+    return {
+        'ticks': done,
+        'ticks_per_sec': done / update_time if update_time > 0 else 0.0,
+        'tick_ms': update_time * 1000 / done if done else 0.0,
+        'stats_us': stats_time * 1e6 / done if done else 0.0,
+    }
+
+
+def measure_draw(world, panel, frames=DRAW_FRAMES):
+    """Среднее время полной отрисовки мира на поверхность вне экрана, мс."""
+    surface = pygame.Surface((world.width * BLOCK_SIZE, world.height * BLOCK_SIZE))
+    if isinstance(world, ArrayWorld):
+        renderer = PixelRenderer(world.width, world.height)
+        draw = lambda: renderer.draw(world, surface, panel)
+    else:
+        draw = lambda: world.draw(surface, panel)
+
+    draw()  # Первый кадр заполняет кэши цветов
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw()
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def measure_memory(scenario, engine):
+    """Пик выделенной памяти при построении мира сценария в расчёте на клетку, байт.
+
+    Замер идёт отдельным построением: tracemalloc замедляет код, и время
+    в других замерах он бы исказил."""
+    tracemalloc.start()
+    try:
+        world = build(scenario, engine)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / max(len(world), 1)
+
+
+def run_scenario(scenario, engine):
+    pygame.font.init()
+    panel = ControlPanel(width=200)
+
+    world = build(scenario, engine)
+    result = {'cells_start': len(world)}
+    result.update(measure_updates(world, panel, scenario.ticks))
+    result['cells_end'] = len(world)
+    result['draw_ms'] = measure_draw(world, panel)
+    result['peak_bytes_per_cell'] = measure_memory(scenario, engine)
+    return result
@@ -0,0 +1,80 @@
+"""Отчёт о памяти на клетку и на блок поля.
+
+    python -m benchmarks.memory --output memory.json
+    python -m benchmarks.memory --baseline memory.json
+
+С --baseline рядом с текущими значениями печатаются значения из
+сохранённого отчёта (например, снятого до изменения представления клеток).
+"""
+import argparse
+import json
+import sys
+import tracemalloc
+
+from batch import populate
+from world import World
+
+WIDTH = 133
+HEIGHT = 100
+PHOTOSYNTHETIC = 3000
+PREDATORS = 800
+
+
+def object_size(value):
+    """Размер объекта вместе с его __dict__, если он есть."""
+    size = sys.getsizeof(value)
+    if hasattr(value, '__dict__'):
+        size += sys.getsizeof(value.__dict__)
+    return size
+
+
+def measure():
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        world = World(WIDTH, HEIGHT, seed=1)
+        empty = tracemalloc.get_traced_memory()[0]
+        populate(world, PHOTOSYNTHETIC, PREDATORS)
+        populated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    cell = world.cells[0]
+    return {
+        'cells': len(world),
+        'bytes_per_square': (empty - before) / (WIDTH * HEIGHT),
+        'bytes_per_cell': (populated - empty) / len(world),
+        'cell_object': object_size(cell),
+        'block_object': object_size(cell.block),
+        'genome': sys.getsizeof(cell.genome),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.memory', description='Memory per cell report.')
+    parser.add_argument('--output', metavar='PATH', help='write the report as JSON')
+    parser.add_argument('--baseline', metavar='PATH', help='show a saved report next to the current one')
+    args = parser.parse_args()
+
+    report = measure()
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f'{WIDTH}x{HEIGHT} world, {report["cells"]} cells')
+    for name, value in report.items():
+        if name == 'cells':
+            continue
+        if name in baseline:
+            print(f'{name:18} {baseline[name]:10.1f} -> {value:10.1f} bytes')
+        else:
+            print(f'{name:18} {value:10.1f} bytes')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Фиксированные сценарии замеров: размер сетки, начальное население и прогрев."""
+import dataclasses
+
+from config import BLOCK_SIZE, PLAYGROUND_HEIGHT, PLAYGROUND_WIDTH
+
+SMALL = (64, 48)
+DEFAULT = (PLAYGROUND_WIDTH // BLOCK_SIZE, PLAYGROUND_HEIGHT // BLOCK_SIZE)
+LARGE = (200, 150)
+
+
+@dataclasses.dataclass(frozen=True)
+class Scenario:
+    """Один сценарий. warmup — тики до начала замера: 0 меряет холодный старт
+    сразу после расселения, иначе — установившееся состояние."""
+    name: str
+    size: tuple
+    photosynthetic: int
+    predators: int
+    warmup: int = 0
+    ticks: int = 100
+    seed: int = 1
+
+
+SCENARIOS = (
+    Scenario('sparse_cold', DEFAULT, 300, 80),
+    Scenario('sparse_steady', DEFAULT, 300, 80, warmup=300),
+    Scenario('dense_cold', DEFAULT, 3000, 800),
+    Scenario('dense_steady', DEFAULT, 3000, 800, warmup=300),
+    Scenario('predator_cold', DEFAULT, 800, 2400),
+    Scenario('predator_steady', DEFAULT, 800, 2400, warmup=300),
+    Scenario('small_dense_steady', SMALL, 700, 200, warmup=300),
+    Scenario('large_dense_cold', LARGE, 6800, 1800),
+)
+
+
+def select(names=None):
+    """Сценарии по именам в исходном порядке; None — все."""
+    if not names:
+        return SCENARIOS
+    unknown = set(names) - {scenario.name for scenario in SCENARIOS}
+    if unknown:
+        raise ValueError(f'unknown scenarios: {", ".join(sorted(unknown))}')
+    return tuple(scenario for scenario in SCENARIOS if scenario.name in names)
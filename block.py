@@ -1,23 +1,11 @@
-import pygame
-from config import *
-
-
 class Block:
-    def __init__(self, x, y):
+    __slots__ = ('x', 'y', 'index', 'cell')
+
+    def __init__(self, x, y, index=None):
         self.x = x
         self.y = y
+        self.index = index  # Плоский индекс в DenseGrid
         self.cell = None
-        self.rect = pygame.Rect(
-            x * BLOCK_SIZE,
-            y * BLOCK_SIZE,
-            BLOCK_SIZE,
-            BLOCK_SIZE
-        )
-
-    def draw(self, surface):
-        pygame.draw.rect(surface, (40, 40, 40), self.rect, 1)
-        if self.cell:
-            self.cell.draw(surface)
 
     def get_coordinates(self):
         return (self.x, self.y)
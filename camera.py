@@ -0,0 +1,59 @@
+"""Камера игрового поля: сдвиг и масштаб вида на мир."""
+
+MAX_ZOOM = 32  # Пикселей на блок при максимальном приближении
+
+
+class Camera:
+    """Видимая часть мира на поверхности view_width x view_height пикселей.
+
+    (x, y) — мировые координаты левого верхнего угла вида в блоках,
+    zoom — пикселей на блок. Минимальный масштаб — когда мир целиком
+    помещается в вид."""
+
+    def __init__(self, view_width, view_height, world_width, world_height, zoom=None):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.min_zoom = min(view_width / world_width, view_height / world_height, MAX_ZOOM)
+        self.x = 0.0
+        self.y = 0.0
+        self.zoom = self.min_zoom if zoom is None else min(max(zoom, self.min_zoom), MAX_ZOOM)
+        self._clamp()
+
+    def pan(self, dx, dy):
+        """Сдвигает вид на (dx, dy) пикселей экрана."""
+        self.x -= dx / self.zoom
+        self.y -= dy / self.zoom
+        self._clamp()
+
+    def zoom_at(self, factor, screen_x, screen_y):
+        """Меняет масштаб в factor раз, оставляя на месте точку мира под (screen_x, screen_y)."""
+        world_x = self.x + screen_x / self.zoom
+        world_y = self.y + screen_y / self.zoom
+        self.zoom = min(max(self.zoom * factor, self.min_zoom), MAX_ZOOM)
+        self.x = world_x - screen_x / self.zoom
+        self.y = world_y - screen_y / self.zoom
+        self._clamp()
+
+    def reset(self):
+        self.zoom = self.min_zoom
+        self.x = self.y = 0.0
+        self._clamp()
+
+    def screen_to_world(self, screen_x, screen_y):
+        """Блок под точкой экрана."""
+        return int(self.x + screen_x / self.zoom), int(self.y + screen_y / self.zoom)
+
+    def visible(self):
+        """Видимые блоки (x0, y0, x1, y1), x1 и y1 не включаются, в пределах мира."""
+        x0 = int(self.x)
+        y0 = int(self.y)
+        x1 = min(self.world_width, int(self.x + self.view_width / self.zoom) + 1)
+        y1 = min(self.world_height, int(self.y + self.view_height / self.zoom) + 1)
+        return x0, y0, x1, y1
+
+    def _clamp(self):
+        # Вид не уходит за край мира; если мир меньше вида — прижат к левому верхнему углу
+        self.x = min(max(self.x, 0.0), max(0.0, self.world_width - self.view_width / self.zoom))
+        self.y = min(max(self.y, 0.0), max(0.0, self.world_height - self.view_height / self.zoom))
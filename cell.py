@@ -1,140 +1,110 @@
-import pygame
-import random
-from enum import Enum
-from config import *
-from directions import Direction
-
-
-class CellType(Enum):
-    PHOTOSYNTHETIC = 0
-    PREDATOR = 1
+from cell_type import CELL_COLORS, CellType
+from population_stats import AGE_BUCKET_SIZE
 
 
 class Cell:
-    def __init__(self, block, genome=None, cell_type=CellType.PHOTOSYNTHETIC, clan_id=None):
+    __slots__ = ('block', 'index', 'genome_id', 'genome', 'energy', 'cell_type', 'max_energy', 'age',
+                 'energy_bucket', 'direction', 'genome_step', 'program', 'clan_id')
+
+    def __init__(self, world, block, genome=None, cell_type=CellType.PHOTOSYNTHETIC, clan_id=None):
+        # Геном интернируется в реестре мира: клетка хранит его идентификатор
+        # и общую для всех носителей строку байтов
+        genome_id = world.genomes.intern(genome if genome else self._generate_genome(world, cell_type))
+        direction = world.rng.direction()  # Номер направления, см. directions.Direction
+        self._init_fields(world, block, genome_id, cell_type,
+                          clan_id if clan_id is not None else self._generate_clan_id(world), direction)
+
+    @classmethod
+    def seeded(cls, world, block, genome_id, cell_type, clan_id, direction):
+        """Клетка заселения с геномом, уже зарегистрированным в world.genomes (GenomeRegistry.intern_many)."""
+        cell = cls.__new__(cls)
+        cell._init_fields(world, block, genome_id, cell_type, clan_id, direction)
+        return cell
+
+    def _init_fields(self, world, block, genome_id, cell_type, clan_id, direction):
+        """Заполняет все поля клетки; общая часть __init__ и seeded."""
         self.block = block
         self.block.cell = self
-        self.genome = genome if genome else self._generate_genome(cell_type)
-        self.energy = CELL_ENERGY_START
+        self.index = None  # Позиция в World.cells, None у удалённой клетки
+        self.genome_id = genome_id
+        self.genome = world.genomes.get(genome_id)
+        self.energy = world.config.cell_energy_start
         self.cell_type = cell_type
-        self.max_energy = CELL_ENERGY_MAX_PHOTOSYNTHETIC if cell_type == CellType.PHOTOSYNTHETIC else CELL_ENERGY_MAX_PREDATOR
+        self.max_energy = world.config.max_energy(cell_type)
         self.age = 0
-        self.direction = Direction.get_random_direction()
+        self.energy_bucket = None  # Последняя отрисованная градация энергии
+        self.direction = direction
         self.genome_step = 0
-        self.clan_id = clan_id if clan_id is not None else self._generate_clan_id()
+        self.program = world.genomes.program(genome_id, cell_type)
+        self.clan_id = clan_id
 
-        if cell_type == CellType.PHOTOSYNTHETIC:
-            self.color = (0, 255, 0)  # Зеленый цвет
-        else:
-            self.color = (255, 0, 0)  # Красный цвет
+    @property
+    def color(self):
+        return CELL_COLORS[self.cell_type]
 
     @staticmethod
-    def _generate_clan_id():
+    def _generate_clan_id(world):
         """Генерирует уникальный идентификатор клана для новых клеток."""
-        return random.randint(1, 1000000)
+        return world.lineage.new_clan()
 
-    def _generate_genome(self, cell_type):
+    @staticmethod
+    def _generate_genome(world, cell_type):
         if cell_type == CellType.PHOTOSYNTHETIC:
-            return [random.randint(1, 64) for _ in range(64)]
+            return world.rng.genome()
         else:
-            genome = [random.randint(1, 64) for _ in range(64)]
+            genome = bytearray(world.rng.genome())
             # Заблокировать действие фотосинтеза для хищных клеток
-            genome[25:33] = [0] * 8
-            return genome
+            genome[25:33] = bytes(8)
+            return bytes(genome)
 
     def is_relative(self, other_cell):
         """Проверяет, является ли данная клетка родственником другой клетки."""
-        return self.genome == other_cell.genome
-
-    def draw(self, surface):
-        center = (
-            self.block.x * BLOCK_SIZE + BLOCK_SIZE // 2,
-            self.block.y * BLOCK_SIZE + BLOCK_SIZE // 2
-        )
-
-        # Рисуем круг с полученным цветом
-        # pygame.draw.circle(surface, self.color, center, BLOCK_SIZE // 2 - 1)
-        # Рисуем квадрат с полученным цветом
-        pygame.draw.rect(surface,
-                         self.color,
-                         pygame.Rect(center[0] - BLOCK_SIZE // 2,
-                                     center[1] - BLOCK_SIZE // 2,
-                                     BLOCK_SIZE - 1,
-                                     BLOCK_SIZE - 1))
-
-        # Рисуем направление
-        direction_offset = self.direction.get_offset()
-        end_point = (
-            center[0] + direction_offset[0] * (BLOCK_SIZE // 3),
-            center[1] + direction_offset[1] * (BLOCK_SIZE // 3)
-        )
-        pygame.draw.line(surface, (255, 255, 255), center, end_point, 2)
-
-    def mutate_genome(self):
-        new_genome = self.genome.copy()
-        if random.random() < 0.125:
-            mutation_point = random.randint(0, 63)
-            new_genome[mutation_point] = random.randint(1, 64)
-
-        return new_genome
+        return self.genome_id == other_cell.genome_id
+
+    def mutate_genome(self, world):
+        # Без мутации потомок получает тот же геном и ту же скомпилированную программу
+        if world.rng.random() < world.config.mutation_chance:
+            new_genome = bytearray(self.genome)
+            mutation_point = world.rng.genome_step()
+            new_genome[mutation_point] = world.rng.gene()
+            return bytes(new_genome)
+
+        return self.genome
 
     def process_action(self, world):
         """Обработка текущего действия клетки на основе текущего гена и его результата."""
-        if self.energy <= 0 or self.age >= 1000 or self.energy > self.max_energy:
+        if self.energy <= 0 or self.age >= world.config.max_age or self.energy > self.max_energy:
             world.remove_cell(self)
             return
 
-        current_gene = self.genome[self.genome_step]
-        next_step = self._process_gene(current_gene, world)
+        energy = self.energy
+        action = self.program.actions[self.genome_step]
+        if action:
+            next_step = world.actions[action](self, world)
+        else:
+            # Если ген не соответствует ни одному действию
+            next_step = self.program.jumps[self.genome_step]
         self.genome_step = (self.genome_step + next_step) % 64
         self.energy -= 1
         self.age += 1
 
-    def _process_gene(self, gene, world):
-        """Обработка текущего гена и выбор действия на основе диапазонов значений гена."""
-        actions = {
-            range(1, 9): self._look_forward,
-            range(9, 17): self._move_forward,
-            range(17, 25): self._turn,
-            range(33, 41): self._reproduce,
-            # range(49, 51): self._check_energy_level,
-        }
-
-        if self.cell_type == CellType.PHOTOSYNTHETIC:
-            actions.update({
-                range(25, 33): self._photosynthesis,
-                range(41, 49): self._give_energy,  # Передача энергии
-            })
-        else:
-            actions.update({
-                range(25, 33): self._attack,
-                range(41, 49): self._byte,  # Атака, оставаясь на своём месте.
-            })
-
-        for number_range, action in actions.items():
-            if gene in number_range:
-                return action(world)
-
-        return gene  # Если ген не соответствует ни одному действию
-
-    def _look_forward(self, world, distance=1):
-        """
-        Определяет, что находится на указанном расстоянии впереди клетки.
-        Аргументы:
-            - distance (int): Расстояние, на котором клетка "смотрит" вперед.
-        """
-        x, y = self.block.get_coordinates()
-        dx, dy = self.direction.get_offset()
-        next_x, next_y = x + dx * distance, y + dy * distance
-
-        if not world.is_valid_position(next_x, next_y):
+        stats = world.stats
+        stats.total_energy += self.energy - energy
+        if self.age % AGE_BUCKET_SIZE == 0:
+            stats.aged(self.age)
+        if world.dirty_blocks is not None:
+            world.mark_energy(self)
+
+    def _look_forward(self, world):
+        """Определяет, что находится впереди клетки."""
+        square = world.grid.ahead(self.block, self.direction)
+        if square is None:
             return 2  # Стена
 
-        next_block = world.get_block(next_x, next_y)
-        if next_block.is_empty():
+        other_cell = world.grid.cell_in(square)
+        if other_cell is None:
             return 1  # Пустая клетка
         else:
-            other_cell = next_block.cell
             if self.is_relative(other_cell):
                 return 5  # Родственная клетка
             elif other_cell.cell_type == CellType.PHOTOSYNTHETIC:
@@ -143,20 +113,14 @@ class Cell:
                 return 4  # Хищная клетка
 
     def _move_forward(self, world):
-        if self.energy < MOVEMENT_COST:
+        if self.energy < world.config.movement_cost:
             return 1
 
-        x, y = self.block.get_coordinates()
-        dx, dy = self.direction.get_offset()
-        next_x, next_y = x + dx, y + dy
-
-        if world.is_valid_position(next_x, next_y) and world.get_block(next_x, next_y).is_empty():
-            old_block = self.block
-            new_block = world.get_block(next_x, next_y)
-            old_block.cell = None
-            self.block = new_block
-            new_block.cell = self
-            self.energy -= MOVEMENT_COST
+        grid = world.grid
+        square = grid.ahead(self.block, self.direction)
+        if square is not None and grid.cell_in(square) is None:
+            world.move_cell(self, grid.block_in(square))
+            self.energy -= world.config.movement_cost
             return 2
         return 1
 
@@ -165,15 +129,11 @@ class Cell:
         # self.direction = Direction.from_genome_number(next_gene)
         # return 2
 
-        next_gene = self.genome[(self.genome_step + 1) % 64]
-
-        # Поворот на основе значения гена
-        if 17 <= next_gene <= 20:
-            # Повернуть влево на 90°
-            self.direction = self.direction.left()
-        elif 21 <= next_gene <= 24:
-            # Повернуть вправо на 90°
-            self.direction = self.direction.right()
+        # Поворот на основе значения следующего гена, заранее вычисленный в программе генома
+        turn = self.program.turns[self.genome_step]
+        if turn:
+            self.direction = (self.direction + turn) % 8
+            world.mark_dirty(self.block)
 
         # Переход к следующему гену
         return 2
@@ -188,65 +148,54 @@ class Cell:
             return 1  # Очень низкий уровень энергии, критический
 
     def _photosynthesis(self, world):
-        if self.energy + PHOTOSYNTHESIS_ENERGY > self.max_energy:
+        photosynthesis_energy = world.config.photosynthesis_energy
+        if self.energy + photosynthesis_energy > self.max_energy:
             self.energy += self.max_energy - self.energy
         else:
-            self.energy += PHOTOSYNTHESIS_ENERGY
+            self.energy += photosynthesis_energy
         return 1
 
     def _reproduce(self, world):
-        if self.energy < REPRODUCTION_THRESHOLD or (self.energy >= self.max_energy and self.cell_type == CellType.PHOTOSYNTHETIC):
+        if self.energy < world.config.reproduction_threshold or (self.energy >= self.max_energy and self.cell_type == CellType.PHOTOSYNTHETIC):
             return 1
 
-        x, y = self.block.get_coordinates()
-        dx, dy = self.direction.get_offset()
-        next_x, next_y = x + dx, y + dy
-
-        if world.is_valid_position(next_x, next_y) and world.get_block(next_x, next_y).is_empty():
-            new_genome = self.mutate_genome()
-            new_block = world.get_block(next_x, next_y)
-
-            # У потомка такой же клан, как у родителя
-            new_cell = Cell(new_block, new_genome, self.cell_type, self.clan_id)
-
-            world.cells.append(new_cell)  # Добавляем новую клетку в список мира
+        grid = world.grid
+        square = grid.ahead(self.block, self.direction)
+        if square is not None and grid.cell_in(square) is None:
+            new_genome = self.mutate_genome(world)
+            new_block = grid.block_in(square)
 
             # Разделяем энергию
             shared_energy = self.energy // 2
             self.energy = shared_energy
-            new_cell.energy = shared_energy
+
+            # У потомка такой же клан, как у родителя
+            world.spawn_cell(new_block, new_genome, self.cell_type, self.clan_id,
+                             energy=shared_energy, birth=True, parent=self)
 
             return 3
         return 1
 
     def _attack(self, world):
         """Атаковать жертву и переместиться на её место"""
-        x, y = self.block.get_coordinates()
-        dx, dy = self.direction.get_offset()
-        next_x, next_y = x + dx, y + dy
-
-        if world.is_valid_position(next_x, next_y) and not world.get_block(next_x, next_y).is_empty():
-            victim = world.get_block(next_x, next_y).cell
+        grid = world.grid
+        square = grid.ahead(self.block, self.direction)
+        victim = grid.cell_in(square) if square is not None else None
+        if victim is not None:
             if victim.clan_id != self.clan_id:
                 self.energy += victim.energy * 0.8
                 world.remove_cell(victim)
-                old_block = self.block
-                new_block = world.get_block(next_x, next_y)
-                old_block.cell = None
-                self.block = new_block
-                new_block.cell = self
-                self.energy -= MOVEMENT_COST
+                # Блок запрашивается заново: чанк жертвы мог освободиться вместе с ней
+                world.move_cell(self, grid.block_in(square))
+                self.energy -= world.config.movement_cost
                 return 2
         return 1
 
     def _byte(self, world):
         """Атаковать жертву, оставшись в своей клетке"""
-        x, y = self.block.get_coordinates()
-        dx, dy = self.direction.get_offset()
-        next_x, next_y = x + dx, y + dy
-
-        if world.is_valid_position(next_x, next_y) and not world.get_block(next_x, next_y).is_empty():
-            victim = world.get_block(next_x, next_y).cell
+        square = world.grid.ahead(self.block, self.direction)
+        victim = world.grid.cell_in(square) if square is not None else None
+        if victim is not None:
             if victim.clan_id != self.clan_id:
                 self.energy += victim.energy * 0.7
                 world.remove_cell(victim)
@@ -255,18 +204,18 @@ class Cell:
 
     def _give_energy(self, world):
         """Передает часть энергии клетке впереди, если она существует и не заполнена энергией."""
-        x, y = self.block.get_coordinates()
-        dx, dy = self.direction.get_offset()
-        next_x, next_y = x + dx, y + dy
-
-        if world.is_valid_position(next_x, next_y) and not world.get_block(next_x, next_y).is_empty():
-            target = world.get_block(next_x, next_y).cell
+        square = world.grid.ahead(self.block, self.direction)
+        target = world.grid.cell_in(square) if square is not None else None
+        if target is not None:
 
             # Передавать энергию только родственникам или фотосинтетическим клеткам
             if target.energy < target.max_energy:
                 transferred_energy = self.energy * 0.2
                 self.energy -= transferred_energy
                 target.energy += transferred_energy
+                world.stats.total_energy += transferred_energy
+                if world.dirty_blocks is not None:
+                    world.mark_energy(target)
 
                 # Различные значения в зависимости от типа клетки впереди
                 if self.is_relative(target):
@@ -276,3 +225,17 @@ class Cell:
                 else:
                     return 3  # Хищная клетка
         return 1  # Если впереди пусто или стена
+
+
+# Обработчики действий по индексу Action
+Cell._ACTIONS = (
+    None,
+    Cell._look_forward,
+    Cell._move_forward,
+    Cell._turn,
+    Cell._photosynthesis,
+    Cell._attack,
+    Cell._reproduce,
+    Cell._give_energy,
+    Cell._byte,
+)
\ No newline at end of file
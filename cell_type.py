@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class CellType(Enum):
+    PHOTOSYNTHETIC = 0
+    PREDATOR = 1
+
+
+# Цвета клеток в режиме отображения типов
+CELL_COLORS = {
+    CellType.PHOTOSYNTHETIC: (0, 255, 0),  # Зеленый цвет
+    CellType.PREDATOR: (255, 0, 0),  # Красный цвет
+}
\ No newline at end of file
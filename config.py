@@ -1,3 +1,5 @@
+import dataclasses
+
 PLAYGROUND_WIDTH = 800
 PLAYGROUND_HEIGHT = 600
 WINDOW_WIDTH = PLAYGROUND_WIDTH + 200
@@ -12,4 +14,45 @@ CELL_ENERGY_MAX_PREDATOR = 1500
 PHOTOSYNTHESIS_ENERGY = 10
 MOVEMENT_COST = 8
 REPRODUCTION_THRESHOLD = 350
+MAX_AGE = 1000
+MUTATION_CHANCE = 0.125
 FPS = 120
+
+ENERGY_BUCKETS = 32 # Число градаций цвета в режиме отображения энергии
+
+
+@dataclasses.dataclass(frozen=True)
+class SimulationConfig:
+    """Параметры симуляции одного мира.
+
+    Значения по умолчанию — константы выше. Каждый мир получает свой
+    объект, поэтому миры с разными параметрами могут работать в одном
+    процессе или в разных процессах пула без общего состояния."""
+    cell_energy_start: float = CELL_ENERGY_START
+    cell_energy_max_photosynthetic: float = CELL_ENERGY_MAX_PHOTOSYNTHETIC
+    cell_energy_max_predator: float = CELL_ENERGY_MAX_PREDATOR
+    photosynthesis_energy: float = PHOTOSYNTHESIS_ENERGY
+    movement_cost: float = MOVEMENT_COST
+    reproduction_threshold: float = REPRODUCTION_THRESHOLD
+    max_age: int = MAX_AGE
+    mutation_chance: float = MUTATION_CHANCE
+    toroidal: bool = False  # Края поля смыкаются, клетки у края видят противоположный
+
+    def max_energy(self, cell_type):
+        """Предел энергии для типа клетки (порядок — как в CellType)."""
+        return (self.cell_energy_max_photosynthetic, self.cell_energy_max_predator)[cell_type.value]
+
+    def replace(self, **changes):
+        return dataclasses.replace(self, **changes)
+
+    def to_dict(self):
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, values):
+        """Создаёт конфигурацию из словаря, неизвестные ключи — ошибка."""
+        names = {field.name for field in dataclasses.fields(cls)}
+        unknown = set(values) - names
+        if unknown:
+            raise ValueError(f'unknown config parameters: {", ".join(sorted(unknown))}')
+        return cls(**values)
\ No newline at end of file
@@ -1,6 +1,10 @@
 from enum import Enum
 import random
 
+# Смещения (dx, dy) по номеру направления. Клетки хранят направление числом
+# и берут смещение из этой таблицы.
+DIRECTION_OFFSETS = ((0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1))
+
 class Direction(Enum):
     NORTH = 0
     NORTHEAST = 1
@@ -12,25 +16,18 @@ class Direction(Enum):
     NORTHWEST = 7
 
     @classmethod
-    def get_random_direction(cls):
-        return random.choice(list(cls))
+    def get_random_direction(cls, rng=None):
+        """Случайное направление; rng — генератор мира (WorldRandom)."""
+        if rng is None:
+            return random.choice(list(cls))
+        return cls(rng.direction())
 
     @classmethod
     def from_genome_number(cls, number):
         return cls(number % 8)
 
     def get_offset(self):
-        offsets = {
-            Direction.NORTH: (0, -1),
-            Direction.NORTHEAST: (1, -1),
-            Direction.EAST: (1, 0),
-            Direction.SOUTHEAST: (1, 1),
-            Direction.SOUTH: (0, 1),
-            Direction.SOUTHWEST: (-1, 1),
-            Direction.WEST: (-1, 0),
-            Direction.NORTHWEST: (-1, -1)
-        }
-        return offsets[self]
+        return DIRECTION_OFFSETS[self.value]
 
     def left(self, steps=1):
         """Поворачивает влево на заданное количество шагов (45° за шаг)."""
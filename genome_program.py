@@ -0,0 +1,113 @@
+"""Компиляция генома в таблицу действий.
+
+Вместо того чтобы на каждом тике строить словарь диапазонов генов и искать
+в нём действие, геном вместе с типом клетки один раз превращается в
+GenomeProgram: для каждого из 64 шагов заранее известно действие, переход
+для генов без действия и результат поворота, который читает Cell._turn.
+"""
+from array import array
+from enum import IntEnum
+
+import numpy as np
+
+from cell_type import CellType
+
+GENOME_LENGTH = 64
+
+
+class Action(IntEnum):
+    NONE = 0
+    LOOK = 1
+    MOVE = 2
+    TURN = 3
+    PHOTOSYNTHESIS = 4
+    ATTACK = 5
+    REPRODUCE = 6
+    GIVE_ENERGY = 7
+    BYTE = 8
+
+
+def _build_action_table():
+    """Таблица [тип клетки][ген] -> действие, как в прежнем Cell._process_gene."""
+    common = {
+        range(1, 9): Action.LOOK,
+        range(9, 17): Action.MOVE,
+        range(17, 25): Action.TURN,
+        range(33, 41): Action.REPRODUCE,
+        # range(49, 51): Action.CHECK_ENERGY_LEVEL,
+    }
+    by_type = {
+        CellType.PHOTOSYNTHETIC: {
+            range(25, 33): Action.PHOTOSYNTHESIS,
+            range(41, 49): Action.GIVE_ENERGY,  # Передача энергии
+        },
+        CellType.PREDATOR: {
+            range(25, 33): Action.ATTACK,
+            range(41, 49): Action.BYTE,  # Атака, оставаясь на своём месте.
+        },
+    }
+
+    table = []
+    for cell_type in CellType:
+        row = [Action.NONE] * (GENOME_LENGTH + 1)
+        for ranges in (common, by_type[cell_type]):
+            for number_range, action in ranges.items():
+                for gene in number_range:
+                    row[gene] = action
+        table.append(tuple(row))
+    return tuple(table)
+
+
+ACTION_TABLE = _build_action_table()
+
+
+def turn_for_gene(gene):
+    """Поворот, который задаёт ген после гена поворота: -1 влево, 1 вправо, 0 — без поворота."""
+    if 17 <= gene <= 20:
+        return -1
+    elif 21 <= gene <= 24:
+        return 1
+    return 0
+
+
+class GenomeProgram:
+    __slots__ = ('actions', 'jumps', 'turns')
+
+    def __init__(self, actions, jumps, turns):
+        self.actions = actions
+        self.jumps = jumps
+        self.turns = turns
+
+
+def compile_genome(genome, cell_type):
+    """Строит программу генома. Кэшированием программ по геному занимается GenomeRegistry."""
+    actions = ACTION_TABLE[cell_type.value]
+    return GenomeProgram(
+        actions=bytes(actions[gene] for gene in genome),
+        # Если ген не соответствует ни одному действию, переход равен самому гену:
+        # программа ссылается на сам геном, а не копирует его
+        jumps=genome,
+        turns=array('b', [turn_for_gene(genome[(step + 1) % GENOME_LENGTH]) for step in range(GENOME_LENGTH)]),
+    )
+
+
+ACTION_ARRAY = np.array(ACTION_TABLE, dtype=np.uint8)
+COMPILE_BATCH = 65536
+TURN_ARRAY = np.array([turn_for_gene(gene) for gene in range(GENOME_LENGTH + 1)], dtype=np.int8)
+
+
+def compile_genomes(genomes, cell_types):
+    """Программы для строк genomes (список bytes) одним векторным проходом;
+    cell_types — массив значений CellType."""
+    programs = []
+    types = np.asarray(cell_types, dtype=np.intp)
+    # Порциями: индексы таблиц при выборке занимают по 8 байт на ген
+    for start in range(0, len(genomes), COMPILE_BATCH):
+        batch = genomes[start:start + COMPILE_BATCH]
+        matrix = np.frombuffer(b''.join(batch), dtype=np.uint8).reshape(-1, GENOME_LENGTH)
+        actions = ACTION_ARRAY[types[start:start + COMPILE_BATCH, None], matrix].tobytes()
+        turns = TURN_ARRAY[np.roll(matrix, -1, axis=1)].tobytes()
+        for i, genome in enumerate(batch):
+            row = slice(i * GENOME_LENGTH, (i + 1) * GENOME_LENGTH)
+            programs.append(GenomeProgram(actions[row], genome, array('b', turns[row])))
+    return programs
@@ -0,0 +1,92 @@
+"""Реестр геномов: каждый различный геном хранится один раз.
+
+Геном интернируется как неизменяемая строка байтов и получает целочисленный
+идентификатор. Клетки ссылаются на идентификатор, поэтому проверка родства —
+это сравнение чисел, а память растёт с числом различных геномов, а не с
+численностью популяции. Геном удаляется, когда умирает последний его носитель.
+"""
+from cell_type import CellType
+from genome_program import GENOME_LENGTH, compile_genome, compile_genomes
+
+
+class GenomeRegistry:
+    def __init__(self):
+        self._ids = {}
+        self._genomes = {}
+        self._refs = {}
+        self._programs = {}
+        self._next_id = 1
+
+    def __len__(self):
+        return len(self._genomes)
+
+    def __contains__(self, genome_id):
+        return genome_id in self._genomes
+
+    def intern(self, genome):
+        """Регистрирует носителя генома и возвращает идентификатор генома."""
+        genome = bytes(genome)
+        genome_id = self._ids.get(genome)
+        if genome_id is None:
+            genome_id = self._next_id
+            self._next_id += 1
+            self._ids[genome] = genome_id
+            self._genomes[genome_id] = genome
+            self._refs[genome_id] = 1
+            self._programs[genome_id] = {}
+        else:
+            self._refs[genome_id] += 1
+        return genome_id
+
+    def intern_many(self, genomes, cell_types):
+        """intern для строк матрицы genomes (n, 64); cell_types — массив значений CellType.
+
+        Недостающие программы компилируются одним векторным проходом."""
+        data = genomes.tobytes()
+        intern = self.intern
+        genome_ids = [intern(data[start:start + GENOME_LENGTH]) for start in range(0, len(data), GENOME_LENGTH)]
+        kinds = list(CellType)
+        missing = {}
+        for genome_id, value in zip(genome_ids, cell_types.tolist()):
+            programs = self._programs[genome_id]
+            if not programs or kinds[value] not in programs:
+                missing[genome_id, value] = None
+        if missing:
+            keys = list(missing)
+            compiled = compile_genomes([self._genomes[genome_id] for genome_id, _ in keys],
+                                       [value for _, value in keys])
+            for (genome_id, value), program in zip(keys, compiled):
+                self._programs[genome_id][kinds[value]] = program
+        return genome_ids
+
+    def acquire(self, genome_id, carriers=1):
+        """Регистрирует ещё carriers носителей уже известного генома."""
+        self._refs[genome_id] += carriers
+        return genome_id
+
+    def release(self, genome_id):
+        """Снимает носителя; геном без носителей удаляется вместе с программами.
+        Возвращает True, если геном удалён."""
+        refs = self._refs[genome_id] - 1
+        if refs:
+            self._refs[genome_id] = refs
+            return False
+
+        del self._refs[genome_id]
+        del self._programs[genome_id]
+        del self._ids[self._genomes.pop(genome_id)]
+        return True
+
+    def get(self, genome_id):
+        return self._genomes[genome_id]
+
+    def refcount(self, genome_id):
+        return self._refs.get(genome_id, 0)
+
+    def program(self, genome_id, cell_type):
+        """Скомпилированная программа генома для данного типа клетки."""
+        programs = self._programs[genome_id]
+        program = programs.get(cell_type)
+        if program is None:
+            program = programs[cell_type] = compile_genome(self._genomes[genome_id], cell_type)
+        return program
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""Турбо-режим окна: столько тиков за кадр, сколько помещается в бюджет кадра.
+
+При целевой частоте кадров fps на кадр отводится 1 / fps секунд. Из них
+FRAME_BUDGET уходит на тики и отрисовку, остальное — на обработку ввода
+и запас, чтобы окно не подвисало. Число тиков на следующий кадр
+выбирается по скользящим средним времени тика и отрисовки, а сам цикл
+тиков дополнительно останавливается по часам, если тики вдруг стали
+дороже. Заодно здесь считаются тики в секунду для панели.
+"""
+import time
+
+# Доля времени кадра, отдаваемая тикам и отрисовке
+FRAME_BUDGET = 0.85
+# Вес нового замера в скользящих средних времени тика и отрисовки
+SMOOTHING = 0.2
+MAX_TICKS_PER_FRAME = 10000
+# Окно, за которое пересчитывается число тиков в секунду, с
+RATE_WINDOW = 0.5
+
+
+class TurboGovernor:
+    def __init__(self, budget=FRAME_BUDGET, smoothing=SMOOTHING, max_ticks=MAX_TICKS_PER_FRAME):
+        self.budget = budget
+        self.smoothing = smoothing
+        self.max_ticks = max_ticks
+        self.tick_time = 0.0  # Скользящее среднее одного тика, с
+        self.draw_time = 0.0  # Скользящее среднее отрисовки кадра со статистикой, с
+        self.ticks_per_frame = 1
+        self.ticks_per_sec = 0.0
+        self._window_start = time.perf_counter()
+        self._window_ticks = 0
+
+    def _average(self, average, value):
+        return value if not average else average + self.smoothing * (value - average)
+
+    def plan(self, fps):
+        """Сколько тиков уместится в следующий кадр при частоте fps."""
+        available = self.budget / fps - self.draw_time
+        if self.tick_time <= 0 or available <= self.tick_time:
+            return 1
+        return min(int(available / self.tick_time), self.max_ticks)
+
+    def run(self, world, fps):
+        """Тикает world в пределах бюджета кадра; возвращает число сделанных тиков."""
+        planned = self.plan(fps)
+        clock = time.perf_counter
+        start = clock()
+        deadline = start + max(self.budget / fps - self.draw_time, 0.0)
+        ticks = 0
+        while ticks < planned and len(world):
+            world.update()
+            ticks += 1
+            if clock() >= deadline:
+                break
+        self.record_ticks(ticks, clock() - start)
+        self.ticks_per_frame = ticks
+        return ticks
+
+    def record_ticks(self, ticks, seconds=None):
+        """Учитывает ticks тиков; seconds — сколько они заняли, если это известно."""
+        if ticks and seconds is not None:
+            self.tick_time = self._average(self.tick_time, seconds / ticks)
+        self._window_ticks += ticks
+        now = time.perf_counter()
+        if now - self._window_start >= RATE_WINDOW:
+            self.ticks_per_sec = self._window_ticks / (now - self._window_start)
+            self._window_start = now
+            self._window_ticks = 0
+
+    def record_draw(self, seconds):
+        self.draw_time = self._average(self.draw_time, seconds)
@@ -0,0 +1,164 @@
+"""Хранилища блоков мира World.
+
+DenseGrid заранее создаёт блок на каждую клетку поля. ChunkedGrid делит
+поле на квадратные чанки: чанк появляется при первом заселении, блоки
+в нём — при первом обращении, и весь чанк освобождается, когда в нём
+не остаётся клеток. Память зависит от числа клеток и их разброса, а не
+от площади мира. Доступ к блоку по координатам и к соседу в обоих случаях O(1).
+
+Клетки находят квадрат перед собой через ahead(block, direction) и читают
+его через cell_in/block_in; что такое «квадрат» — решает хранилище.
+Мир сообщает хранилищу о заселении и освобождении блоков через
+occupy/vacate.
+"""
+import functools
+from array import array
+
+import numpy as np
+
+from block import Block
+from directions import DIRECTION_OFFSETS
+
+CHUNK_SIZE = 16
+WALL = -1  # Сосед за краем нетороидального мира
+
+
+@functools.lru_cache(maxsize=8)
+def neighbour_table(width, height, toroidal):
+    """Таблица соседей поля: элемент index * 8 + direction — плоский индекс
+    (x * height + y) соседнего блока в этом направлении или WALL.
+
+    Строится один раз на размер поля и общая для всех миров этого размера."""
+    dx = np.array([offset[0] for offset in DIRECTION_OFFSETS])
+    dy = np.array([offset[1] for offset in DIRECTION_OFFSETS])
+    x, y = np.meshgrid(np.arange(width), np.arange(height), indexing='ij')
+    next_x = x[..., None] + dx
+    next_y = y[..., None] + dy
+    if toroidal:
+        table = (next_x % width) * height + next_y % height
+    else:
+        valid = (next_x >= 0) & (next_x < width) & (next_y >= 0) & (next_y < height)
+        table = np.where(valid, next_x * height + next_y, WALL)
+    return array('i', table.astype(np.int32).tobytes())
+
+
+class DenseGrid:
+    """Блоки всех клеток поля в плоском списке; соседи — по таблице neighbour_table.
+
+    Квадрат поля задаётся плоским индексом блока."""
+
+    def __init__(self, width, height, toroidal=False):
+        self.height = height
+        self.squares = [Block(x, y, x * height + y) for x in range(width) for y in range(height)]
+        self.neighbours = neighbour_table(width, height, toroidal)
+
+    def block(self, x, y):
+        return self.squares[x * self.height + y]
+
+    def cell_at(self, x, y):
+        return self.squares[x * self.height + y].cell
+
+    def ahead(self, block, direction):
+        """Квадрат перед блоком в направлении direction или None, если там стена."""
+        square = self.neighbours[block.index * 8 + direction]
+        return None if square == WALL else square
+
+    def block_in(self, square):
+        return self.squares[square]
+
+    def cell_in(self, square):
+        return self.squares[square].cell
+
+    def occupy(self, block):
+        pass
+
+    def vacate(self, block):
+        pass
+
+    def __len__(self):
+        """Число созданных блоков."""
+        return len(self.squares)
+
+
+class Chunk:
+    __slots__ = ('left', 'top', 'blocks', 'occupied')
+
+    def __init__(self, chunk_x, chunk_y, size):
+        self.left = chunk_x * size
+        self.top = chunk_y * size
+        # Блок (x, y) лежит в blocks[(x - left) * size + (y - top)] и создаётся при первом обращении
+        self.blocks = [None] * (size * size)
+        self.occupied = 0
+
+
+class ChunkedGrid:
+    """Квадрат поля задаётся парой координат (x, y)."""
+
+    def __init__(self, width, height, chunk_size=CHUNK_SIZE, toroidal=False):
+        self.width = width
+        self.height = height
+        self.toroidal = toroidal
+        self.chunk_size = chunk_size
+        self.chunks = {}
+
+    def block(self, x, y):
+        """Блок по координатам. Если блока ещё нет, возвращается новый
+        блок, который хранилище запомнит только при заселении (occupy):
+        обращения без заселения не создают чанков."""
+        size = self.chunk_size
+        chunk = self.chunks.get((x // size, y // size))
+        if chunk is None:
+            return Block(x, y)
+        index = (x % size) * size + y % size
+        block = chunk.blocks[index]
+        if block is None:
+            block = chunk.blocks[index] = Block(x, y)
+        return block
+
+    def cell_at(self, x, y):
+        """Клетка в блоке или None; пустые чанки не создаются."""
+        size = self.chunk_size
+        chunk = self.chunks.get((x // size, y // size))
+        if chunk is None:
+            return None
+        block = chunk.blocks[(x % size) * size + y % size]
+        return block.cell if block is not None else None
+
+    def ahead(self, block, direction):
+        """Квадрат перед блоком в направлении direction или None, если там стена.
+        Таблица соседей для огромного поля не строится, смещение считается на месте."""
+        dx, dy = DIRECTION_OFFSETS[direction]
+        x = block.x + dx
+        y = block.y + dy
+        if self.toroidal:
+            return x % self.width, y % self.height
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return x, y
+        return None
+
+    def block_in(self, square):
+        return self.block(*square)
+
+    def cell_in(self, square):
+        return self.cell_at(*square)
+
+    def occupy(self, block):
+        size = self.chunk_size
+        key = (block.x // size, block.y // size)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = Chunk(key[0], key[1], size)
+            chunk.blocks[(block.x % size) * size + block.y % size] = block
+        chunk.occupied += 1
+
+    def vacate(self, block):
+        size = self.chunk_size
+        key = (block.x // size, block.y // size)
+        chunk = self.chunks[key]
+        chunk.occupied -= 1
+        if not chunk.occupied:
+            del self.chunks[key]
+
+    def __len__(self):
+        """Число созданных блоков."""
+        return sum(len(chunk.blocks) - chunk.blocks.count(None) for chunk in self.chunks.values())
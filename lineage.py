@@ -0,0 +1,131 @@
+"""Родословная видов (различных геномов) и выдача идентификаторов кланов.
+
+Узел родословной — геном с идентификатором из GenomeRegistry. Корни —
+геномы клеток, созданных при заселении мира; потомок с мутировавшим
+геномом добавляет узел с родителем — событие видообразования.
+
+Память ограничена числом живых видов. Вымерший вид без потомков в
+родословной удаляется, а вымерший вид с единственным потомком
+вырезается: потомок подвешивается к его родителю. Остаются только
+живые виды и вымершие точки ветвления, то есть не больше двух узлов на
+живой вид. Удалённые виды учитываются в счётчике pruned ближайшего
+сохранившегося предка.
+"""
+import collections
+
+# Сколько последних событий видообразования хранится
+RECENT_EVENTS = 1000
+
+
+class LineageNode:
+    __slots__ = ('parent', 'clan_id', 'depth', 'born', 'extinct', 'children', 'pruned')
+
+    def __init__(self, parent, clan_id, depth, born):
+        self.parent = parent
+        self.clan_id = clan_id
+        self.depth = depth  # Поколение вида от корня, не меняется при вырезании предков
+        self.born = born
+        self.extinct = None  # Тик вымирания
+        self.children = set()
+        self.pruned = 0  # Удалённые из родословной виды-потомки
+
+
+class LineageTracker:
+    def __init__(self, next_clan_id=1):
+        self.nodes = {}
+        self.next_clan_id = next_clan_id
+        self.events = collections.deque(maxlen=RECENT_EVENTS)
+        self.species = 0  # Всего видов за прогон
+        self.pruned = 0
+
+    def new_clan(self):
+        """Новый идентификатор клана; идентификаторы не повторяются."""
+        clan_id = self.next_clan_id
+        self.next_clan_id += 1
+        return clan_id
+
+    def reserve_clans(self, count):
+        """Выдаёт count идентификаторов кланов подряд и возвращает первый."""
+        first = self.next_clan_id
+        self.next_clan_id += count
+        return first
+
+    def add(self, genome_id, parent_id, clan_id, tick):
+        """Учитывает вид при появлении клетки. Уже известный вид (или потомок
+        без мутации) ничего не меняет; новый вид от родителя — событие
+        видообразования."""
+        if genome_id in self.nodes:
+            return
+        parent = self.nodes.get(parent_id) if parent_id is not None else None
+        if parent is None:
+            self.nodes[genome_id] = LineageNode(None, clan_id, 0, tick)
+        else:
+            self.nodes[genome_id] = LineageNode(parent_id, clan_id, parent.depth + 1, tick)
+            parent.children.add(genome_id)
+            self.events.append((tick, parent_id, genome_id, clan_id))
+        self.species += 1
+
+    def extinct(self, genome_id, tick):
+        """Отмечает вымирание вида (умер последний носитель генома) и сокращает родословную."""
+        node = self.nodes.get(genome_id)
+        if node is None:
+            return
+        node.extinct = tick
+        self._prune(genome_id, node)
+
+    def _prune(self, genome_id, node):
+        # Вымершие листья удаляются, поднимаясь к корню
+        while node.extinct is not None and not node.children:
+            del self.nodes[genome_id]
+            self.pruned += 1
+            if node.parent is None:
+                return
+            parent_id = node.parent
+            parent = self.nodes[parent_id]
+            parent.children.discard(genome_id)
+            parent.pruned += 1 + node.pruned
+            genome_id, node = parent_id, parent
+
+        if node.extinct is not None and len(node.children) == 1:
+            self._splice(genome_id, node)
+
+    def _splice(self, genome_id, node):
+        """Вырезает вымерший вид с одним потомком."""
+        (child_id,) = node.children
+        del self.nodes[genome_id]
+        self.pruned += 1
+        self.nodes[child_id].parent = node.parent
+        if node.parent is not None:
+            parent = self.nodes[node.parent]
+            parent.children.discard(genome_id)
+            parent.children.add(child_id)
+            parent.pruned += 1 + node.pruned
+
+    def ancestry(self, genome_id):
+        """Сохранившиеся предки вида от него самого к корню: список пар (геном, узел)."""
+        chain = []
+        while genome_id is not None:
+            node = self.nodes[genome_id]
+            chain.append((genome_id, node))
+            genome_id = node.parent
+        return chain
+
+    def descendants(self, genome_id):
+        """Сохранившиеся виды-потомки."""
+        found = []
+        stack = list(self.nodes[genome_id].children)
+        while stack:
+            child_id = stack.pop()
+            found.append(child_id)
+            stack.extend(self.nodes[child_id].children)
+        return found
+
+    def summary(self):
+        living = sum(1 for node in self.nodes.values() if node.extinct is None)
+        return {
+            'species': self.species,
+            'living': living,
+            'nodes': len(self.nodes),
+            'pruned': self.pruned,
+            'max_depth': max((node.depth for node in self.nodes.values()), default=0),
+        }
@@ -0,0 +1,327 @@
+"""Сводки по плиткам поля для отрисовки мира издалека.
+
+Поле делится на квадратные плитки нескольких размеров (уровни
+детализации). Для каждой плитки известно число клеток каждого типа и
+размеры кланов в ней, откуда берутся плотность, преобладающий тип и
+преобладающий клан. TileAggregates поддерживает сводки World
+инкрементально — мир сообщает о появлении, перемещении и гибели
+клеток, — поэтому кадр читает только видимые плитки. ArrayTileAggregates
+делает то же для ArrayWorld пачками изменений за тик. Снимок WorldView
+несёт копии уровней; для миров без сводок (RemoteWorld) ArrayTileLevel
+строит уровень векторно по массивам состояния.
+"""
+from array import array
+
+import numpy as np
+
+from cell_type import CellType
+
+LOD_TILES = (8, 32, 128)
+# Уровень выбирается так, чтобы плитка занимала на экране хотя бы столько пикселей
+MIN_TILE_PIXELS = 2
+
+TYPE_COUNT = len(CellType)
+# Ключ пары (плитка, клан) в сводках ArrayWorld: номер плитки в старших битах
+CLAN_BITS = 32
+CLAN_MASK = (1 << CLAN_BITS) - 1
+
+_NO_CELLS = (np.empty(0, dtype=np.int64),) * 3
+
+
+def choose_tile(tiles, zoom):
+    for size in tiles:
+        if size * zoom >= MIN_TILE_PIXELS:
+            return size
+    return tiles[-1]
+
+
+class TileLevel:
+    def __init__(self, width, height, size):
+        self.size = size
+        self.tiles_x = -(-width // size)
+        self.tiles_y = -(-height // size)
+        tile_count = self.tiles_x * self.tiles_y
+        self.counts = array('i', bytes(4 * tile_count * TYPE_COUNT))
+        self.clans = {}  # Плитка -> {клан: клеток}, только для непустых плиток
+        # Преобладающий клан плитки и число его клеток в ней
+        self.dominant = array('q', bytes(8 * tile_count))
+        self.dominant_size = array('i', bytes(4 * tile_count))
+
+    def tile(self, x, y):
+        return (x // self.size) * self.tiles_y + y // self.size
+
+    def add(self, tile, cell):
+        self.counts[tile * TYPE_COUNT + cell.cell_type.value] += 1
+        clans = self.clans.get(tile)
+        if clans is None:
+            clans = self.clans[tile] = {}
+        size = clans[cell.clan_id] = clans.get(cell.clan_id, 0) + 1
+        if size > self.dominant_size[tile]:
+            self.dominant[tile] = cell.clan_id
+            self.dominant_size[tile] = size
+
+    def remove(self, tile, cell):
+        self.counts[tile * TYPE_COUNT + cell.cell_type.value] -= 1
+        clans = self.clans[tile]
+        size = clans[cell.clan_id] - 1
+        if size:
+            clans[cell.clan_id] = size
+        else:
+            del clans[cell.clan_id]
+            if not clans:
+                del self.clans[tile]
+                clans = None
+        if cell.clan_id == self.dominant[tile]:
+            # Преобладающий клан потерял клетку: ищем лидера среди кланов этой плитки
+            best = max(clans, key=clans.get) if clans else 0
+            self.dominant[tile] = best
+            self.dominant_size[tile] = clans[best] if clans else 0
+
+    def view(self, tx0, ty0, tx1, ty1):
+        """Число клеток по типам в плитках области: массив (tx1 - tx0, ty1 - ty0, типы)."""
+        counts = np.frombuffer(self.counts, dtype=np.int32).reshape(self.tiles_x, self.tiles_y, TYPE_COUNT)
+        return counts[tx0:tx1, ty0:ty1]
+
+    def dominant_clans(self, tx0, ty0, tx1, ty1):
+        """Самый многочисленный клан каждой плитки области, 0 — пустая плитка."""
+        dominant = np.frombuffer(self.dominant, dtype=np.int64).reshape(self.tiles_x, self.tiles_y)
+        return dominant[tx0:tx1, ty0:ty1]
+
+    def frozen(self):
+        """Копия уровня, которую можно читать из другого потока."""
+        return ArrayTileLevel(self.size, self.view(0, 0, self.tiles_x, self.tiles_y).copy(),
+                              self.dominant_clans(0, 0, self.tiles_x, self.tiles_y).copy())
+
+
+class TileAggregates:
+    """Инкрементальные сводки World на всех уровнях детализации (world.tiles)."""
+
+    def __init__(self, width, height, tiles=LOD_TILES):
+        self.tiles = tiles
+        self.levels = {size: TileLevel(width, height, size) for size in tiles}
+
+    @classmethod
+    def from_world(cls, world, tiles=LOD_TILES):
+        aggregates = cls(world.width, world.height, tiles)
+        for cell in world.cells:
+            if cell is not None:
+                aggregates.add(cell)
+        return aggregates
+
+    def add(self, cell):
+        x, y = cell.block.x, cell.block.y
+        for level in self.levels.values():
+            level.add(level.tile(x, y), cell)
+
+    def remove(self, cell):
+        x, y = cell.block.x, cell.block.y
+        for level in self.levels.values():
+            level.remove(level.tile(x, y), cell)
+
+    def move(self, cell, old_block):
+        """Переносит клетку между плитками; ход внутри плитки ничего не меняет."""
+        x, y = cell.block.x, cell.block.y
+        for level in self.levels.values():
+            old_tile = level.tile(old_block.x, old_block.y)
+            new_tile = level.tile(x, y)
+            if old_tile == new_tile:
+                # Плитки крупных уровней вложены в плитки мелких
+                break
+            level.remove(old_tile, cell)
+            level.add(new_tile, cell)
+
+    def level(self, zoom):
+        return self.levels[choose_tile(self.tiles, zoom)]
+
+    def snapshot(self):
+        return TileSnapshot(self.tiles, {size: level.frozen() for size, level in self.levels.items()})
+
+
+class ArrayTileCounts:
+    """Уровень сводок ArrayWorld, который обновляется пачками изменений.
+
+    Размеры кланов в плитках хранятся отсортированными парами ключ
+    (плитка << 32 | клан) и число клеток; пачка изменений вливается в них
+    поиском по ключам, а преобладающий клан пересчитывается только для
+    затронутых плиток."""
+
+    def __init__(self, width, height, size):
+        self.size = size
+        self.tiles_x = -(-width // size)
+        self.tiles_y = -(-height // size)
+        tile_count = self.tiles_x * self.tiles_y
+        self.counts = np.zeros(tile_count * TYPE_COUNT, dtype=np.int32)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.sizes = np.empty(0, dtype=np.int64)
+        self.dominant = np.zeros(tile_count, dtype=np.int64)
+
+    def tile(self, x, y):
+        return (x // self.size).astype(np.int64) * self.tiles_y + y // self.size
+
+    def apply(self, removed, added):
+        """Убирает клетки removed и добавляет added; каждое — тройка массивов (плитка, тип, клан)."""
+        tiles = np.concatenate([removed[0], added[0]])
+        if not len(tiles):
+            return
+        np.subtract.at(self.counts, removed[0] * TYPE_COUNT + removed[1], 1)
+        np.add.at(self.counts, added[0] * TYPE_COUNT + added[1], 1)
+
+        keys = tiles << CLAN_BITS | np.concatenate([removed[2], added[2]])
+        signs = np.repeat([-1, 1], [len(removed[0]), len(added[0])])
+        keys, inverse = np.unique(keys, return_inverse=True)
+        delta = np.bincount(inverse.ravel(), weights=signs, minlength=len(keys)).astype(np.int64)
+        changed = delta != 0
+        keys, delta = keys[changed], delta[changed]
+
+        position = np.searchsorted(self.keys, keys)
+        found = position < len(self.keys)
+        found[found] = self.keys[position[found]] == keys[found]
+        self.sizes[position[found]] += delta[found]
+        if not found.all():
+            self.keys = np.insert(self.keys, position[~found], keys[~found])
+            self.sizes = np.insert(self.sizes, position[~found], delta[~found])
+        empty = self.sizes == 0
+        if empty.any():
+            self.keys = self.keys[~empty]
+            self.sizes = self.sizes[~empty]
+        self._update_dominant(np.unique(keys >> CLAN_BITS))
+
+    def _update_dominant(self, tiles):
+        starts = np.searchsorted(self.keys, tiles << CLAN_BITS)
+        lengths = np.searchsorted(self.keys, (tiles + 1) << CLAN_BITS) - starts
+        self.dominant[tiles] = 0
+        occupied = lengths > 0
+        tiles, starts, lengths = tiles[occupied], starts[occupied], lengths[occupied]
+        if not len(tiles):
+            return
+        # Пары затронутых плиток подряд; отрезок каждой плитки начинается с offsets
+        offsets = np.cumsum(lengths) - lengths
+        pairs = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+        sizes = self.sizes[pairs]
+        largest = np.maximum.reduceat(sizes, offsets)
+        hits = np.flatnonzero(sizes == np.repeat(largest, lengths))
+        segment = np.repeat(np.arange(len(tiles)), lengths)[hits]
+        # При равенстве побеждает клан с меньшим номером — первый в отрезке
+        first = hits[np.r_[True, segment[1:] != segment[:-1]]]
+        self.dominant[tiles] = self.keys[pairs[first]] & CLAN_MASK
+
+    def view(self, tx0, ty0, tx1, ty1):
+        return self.counts.reshape(self.tiles_x, self.tiles_y, TYPE_COUNT)[tx0:tx1, ty0:ty1]
+
+    def dominant_clans(self, tx0, ty0, tx1, ty1):
+        return self.dominant.reshape(self.tiles_x, self.tiles_y)[tx0:tx1, ty0:ty1]
+
+    def frozen(self):
+        return ArrayTileLevel(self.size, self.counts.reshape(self.tiles_x, self.tiles_y, TYPE_COUNT).copy(),
+                              self.dominant.reshape(self.tiles_x, self.tiles_y).copy())
+
+
+class ArrayTileAggregates:
+    """Инкрементальные сводки ArrayWorld на всех уровнях детализации (world.tiles).
+
+    Хранит положения клеток на конец прошлого тика. В конце тика мир
+    передаёт, какие из прежних клеток выжили; сводки убирают погибших,
+    переносят сменивших плитку и добавляют родившихся — работа зависит от
+    числа изменений, а не от числа плиток."""
+
+    def __init__(self, width, height, tiles=LOD_TILES):
+        self.tiles = tiles
+        self.levels = {size: ArrayTileCounts(width, height, size) for size in tiles}
+        self.x = np.empty(0, dtype=np.int32)
+        self.y = np.empty(0, dtype=np.int32)
+
+    @classmethod
+    def from_world(cls, world, tiles=LOD_TILES):
+        aggregates = cls(world.width, world.height, tiles)
+        aggregates.append(world, 0, world.size)
+        return aggregates
+
+    def append(self, world, start, stop):
+        """Добавляет клетки мира с индексами [start, stop) — новые, не из тика."""
+        x, y = world.x[start:stop], world.y[start:stop]
+        for level in self.levels.values():
+            level.apply(_NO_CELLS, (level.tile(x, y), world.cell_type[start:stop], world.clan_id[start:stop]))
+        self.x = np.concatenate([self.x, x])
+        self.y = np.concatenate([self.y, y])
+
+    def advance(self, world, n, alive):
+        """Конец тика: alive — выжившие из n клеток начала тика, клетки [n, size) родились.
+
+        Вызывается до уплотнения массивов мира."""
+        size = world.size
+        x, y = world.x[:size], world.y[:size]
+        cell_type, clan_id = world.cell_type[:size], world.clan_id[:size]
+        dead = np.flatnonzero(~alive)
+        moved = np.flatnonzero(alive & ((x[:n] != self.x) | (y[:n] != self.y)))
+        born = np.arange(n, size)
+        for level in self.levels.values():
+            old_tile = level.tile(self.x[moved], self.y[moved])
+            new_tile = level.tile(x[moved], y[moved])
+            crossed = moved[old_tile != new_tile]
+            gone = np.concatenate([dead, crossed])
+            came = np.concatenate([crossed, born])
+            level.apply((level.tile(self.x[gone], self.y[gone]), cell_type[gone], clan_id[gone]),
+                        (level.tile(x[came], y[came]), cell_type[came], clan_id[came]))
+        keep = np.concatenate([alive, np.ones(size - n, dtype=bool)])
+        self.x = x[keep]
+        self.y = y[keep]
+
+    def level(self, zoom):
+        return self.levels[choose_tile(self.tiles, zoom)]
+
+    def snapshot(self):
+        return TileSnapshot(self.tiles, {size: level.frozen() for size, level in self.levels.items()})
+
+
+class TileSnapshot:
+    """Копии уровней сводок на момент снимка (WorldView.tiles)."""
+
+    def __init__(self, tiles, levels):
+        self.tiles = tiles
+        self.levels = levels
+
+    def level(self, zoom):
+        return self.levels[choose_tile(self.tiles, zoom)]
+
+
+def attach_tiles(world, tiles=LOD_TILES):
+    """Подключает к World или ArrayWorld инкрементальные сводки, если их ещё нет."""
+    if world.tiles is None:
+        aggregates = TileAggregates if hasattr(world, 'cells') else ArrayTileAggregates
+        world.tiles = aggregates.from_world(world, tiles)
+    return world.tiles
+
+
+class ArrayTileLevel:
+    """Уровень детализации в готовых массивах: копия уровня сводок или
+    уровень, построенный по массивам состояния за один проход."""
+
+    def __init__(self, size, counts, dominant):
+        self.size = size
+        self.counts = counts
+        self.dominant = dominant
+
+    @classmethod
+    def from_state(cls, state, width, height, size):
+        tiles_x = -(-width // size)
+        tiles_y = -(-height // size)
+        tile = (state['x'] // size).astype(np.int64) * tiles_y + state['y'] // size
+        tile_count = tiles_x * tiles_y
+        counts = np.bincount(tile * TYPE_COUNT + state['cell_type'],
+                             minlength=tile_count * TYPE_COUNT).reshape(tiles_x, tiles_y, TYPE_COUNT)
+
+        # Преобладающий клан: пары (плитка, клан) с размерами, по плиткам — пара с наибольшим размером
+        dominant = np.zeros(tile_count, dtype=np.int64)
+        if len(tile):
+            pairs, sizes = np.unique(np.stack([tile, state['clan_id']]), axis=1, return_counts=True)
+            order = np.lexsort((sizes, pairs[0]))
+            last = np.r_[pairs[0][order][1:] != pairs[0][order][:-1], True]
+            best = order[last]
+            dominant[pairs[0][best]] = pairs[1][best]
+        return cls(size, counts, dominant.reshape(tiles_x, tiles_y))
+
+    def view(self, tx0, ty0, tx1, ty1):
+        return self.counts[tx0:tx1, ty0:ty1]
+
+    def dominant_clans(self, tx0, ty0, tx1, ty1):
+        return self.dominant[tx0:tx1, ty0:ty1]
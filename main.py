@@ -1,12 +1,76 @@
+import argparse
+import time
+
 import pygame
-import random
 from world import World
+from array_world import ArrayWorld
 from cell import CellType
 from config import *
 from settings_ui import ControlPanel
+from renderer import CameraRenderer, IncrementalRenderer, PixelRenderer
+from camera import Camera
+from lod import attach_tiles
+from simulation_thread import SimulationThread
+from governor import TurboGovernor
+from analytics import BackgroundAnalysis
+
+# Шаг масштаба на одно деление колеса мыши и сдвиг камеры стрелками (пикселей)
+ZOOM_STEP = 1.25
+PAN_STEP = 64
+PAN_KEYS = {
+    pygame.K_LEFT: (PAN_STEP, 0),
+    pygame.K_RIGHT: (-PAN_STEP, 0),
+    pygame.K_UP: (0, PAN_STEP),
+    pygame.K_DOWN: (0, -PAN_STEP),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Cell evolution simulation.')
+    parser.add_argument('--engine', choices=('objects', 'array'), default='objects',
+                        help='objects: World with a Cell per cell, array: NumPy ArrayWorld')
+    parser.add_argument('--renderer', choices=('incremental', 'pixel', 'camera'), default='incremental',
+                        help='incremental: redraw changed blocks, pixel: vectorized pixel buffer '
+                             '(always used with the array engine), camera: pan and zoom with '
+                             'level of detail (always used when the world does not fit the window)')
+    parser.add_argument('--width', type=int, default=PLAYGROUND_WIDTH // BLOCK_SIZE, help='grid width in blocks')
+    parser.add_argument('--height', type=int, default=PLAYGROUND_HEIGHT // BLOCK_SIZE, help='grid height in blocks')
+    parser.add_argument('--seed', type=int, default=None, help='random seed of the world')
+    parser.add_argument('--directions', action='store_true',
+                        help='draw direction ticks with the pixel renderer')
+    parser.add_argument('--profile', action='store_true',
+                        help='start with the per-action tick profiler on (toggle with P)')
+    parser.add_argument('--sync', action='store_true',
+                        help='tick the world in the render loop (one tick per frame_skip frames) '
+                             'instead of a separate simulation thread')
+    parser.add_argument('--turbo', action='store_true',
+                        help='with --sync: run as many ticks per frame as fit in the frame time budget '
+                             '(toggle with T or the Turbo button)')
+    parser.add_argument('--tps', type=float, default=None,
+                        help='target ticks per second of the simulation thread (default: uncapped)')
+    args = parser.parse_args()
+    if args.turbo and not args.sync:
+        parser.error('--turbo requires --sync; the simulation thread speed is set with --tps')
+    return args
+
+
+def add_clicked_cell(world, x, y):
+    """Добавляет клетку случайного типа в блок, по которому кликнули."""
+    if world.rng.random() < 0.5:
+        world.add_cell(x, y)
+    else:
+        world.add_cell(x, y, CellType.PREDATOR)
+
+
+def toggle_profiling(world):
+    if world.profiler is None:
+        world.enable_profiling()
+    else:
+        world.disable_profiling()
 
 
 def main():
+    args = parse_args()
     pygame.init()
 
     # Создаем окно фиксированного размера
@@ -18,19 +82,61 @@ def main():
     control_panel = ControlPanel(width=200)
 
     # Создаем игровой мир с правильными размерами (без смещения)
-    world = World(width=PLAYGROUND_WIDTH // BLOCK_SIZE, height=PLAYGROUND_HEIGHT // BLOCK_SIZE)
-
-    # Создаем начальные клетки с учетом новой ширины
-    for _ in range(3000):
-        x = random.randint(0, world.width - 1)
-        y = random.randint(0, world.height - 1)
-        world.add_cell(x, y)
-
-    for _ in range(800):
-        x = random.randint(0, world.width - 1)
-        y = random.randint(0, world.height - 1)
-        world.add_cell(x, y, CellType.PREDATOR)
-
+    if args.engine == 'array':
+        world = ArrayWorld(width=args.width, height=args.height, seed=args.seed)
+    else:
+        world = World(width=args.width, height=args.height, seed=args.seed)
+
+    # Начальные клетки с той же плотностью, что и на поле по умолчанию
+    scale = (world.width * world.height) / ((PLAYGROUND_WIDTH // BLOCK_SIZE) * (PLAYGROUND_HEIGHT // BLOCK_SIZE))
+    world.populate({CellType.PHOTOSYNTHETIC: round(3000 * scale), CellType.PREDATOR: round(800 * scale)})
+
+    # Подповерхность для игрового мира
+    game_rect = pygame.Rect(
+        control_panel.width, 0,
+        WINDOW_WIDTH - control_panel.width, WINDOW_HEIGHT
+    )
+    game_surface = screen.subsurface(game_rect)
+    camera = None
+    fits = world.width * BLOCK_SIZE <= game_rect.width and world.height * BLOCK_SIZE <= game_rect.height
+    if args.renderer == 'camera' or not fits:
+        # Видна часть мира: колесо мыши — масштаб, правая кнопка или стрелки — сдвиг, Home — весь мир
+        camera = Camera(game_rect.width, game_rect.height, world.width, world.height, zoom=BLOCK_SIZE)
+        renderer = CameraRenderer()
+        # Сводки по плиткам ведёт сам мир, в том числе в потоке симуляции — снимки несут их копии
+        attach_tiles(world)
+    # Мир в отдельном потоке рисуется только по снимкам, поэтому через буфер пикселей
+    elif args.renderer == 'pixel' or args.engine == 'array' or not args.sync:
+        # Весь мир одним векторным проходом по массивам состояния
+        renderer = PixelRenderer(world.width, world.height, show_directions=args.directions)
+    else:
+        # Фон с сеткой кэшируется, каждый кадр перерисовываются только изменившиеся блоки
+        renderer = IncrementalRenderer(world, game_surface)
+    panel_rect = pygame.Rect(0, 0, control_panel.width, WINDOW_HEIGHT)
+
+    # Профилировщик есть только у World
+    profiling = hasattr(world, 'enable_profiling')
+    if args.profile and profiling:
+        world.enable_profiling()
+
+    # Без --sync мир живёт в своём потоке, а изменения из окна идут через его очередь
+    simulation = None
+    if not args.sync:
+        simulation = SimulationThread(world, tick_rate=args.tps)
+        simulation.start()
+        # Скорость потока задаёт --tps, Frame Skip и Turbo к нему не относятся
+        control_panel.disable_tick_controls()
+
+    def apply(function, *function_args):
+        if simulation is not None:
+            simulation.submit(function, *function_args)
+        else:
+            function(*function_args)
+
+    governor = TurboGovernor()
+    analysis = BackgroundAnalysis()
+    control_panel.turbo = args.turbo and control_panel.tick_controls
+    shown_tick = world.tick
     frame_counter = 0
     running = True
 
@@ -43,44 +149,105 @@ def main():
                 # Проверяем, не попал ли клик на панель управления
                 if mouse_pos[0] > control_panel.width:
                     # Пересчитываем координаты относительно игрового поля
-                    game_x = (mouse_pos[0] - control_panel.width) // BLOCK_SIZE
-                    game_y = mouse_pos[1] // BLOCK_SIZE
+                    if camera is None:
+                        game_x = (mouse_pos[0] - control_panel.width) // BLOCK_SIZE
+                        game_y = mouse_pos[1] // BLOCK_SIZE
+                    elif event.button == 1:
+                        game_x, game_y = camera.screen_to_world(mouse_pos[0] - control_panel.width, mouse_pos[1])
+                    else:
+                        # Колесо и правая кнопка управляют камерой
+                        continue
                     if 0 <= game_x < world.width and 0 <= game_y < world.height:
-                        if random.random() < 0.5:
-                            world.add_cell(game_x, game_y)
-                        else:
-                            world.add_cell(game_x, game_y, CellType.PREDATOR)
+                        apply(add_clicked_cell, world, game_x, game_y)
                 else:
                     # Обработка кликов по панели управления
                     control_panel.handle_event(event)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_p and profiling:
+                apply(toggle_profiling, world)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_t and control_panel.tick_controls:
+                control_panel.turbo = not control_panel.turbo
+            elif camera is not None and event.type == pygame.MOUSEWHEEL:
+                mouse_x, mouse_y = pygame.mouse.get_pos()
+                if mouse_x > control_panel.width:
+                    camera.zoom_at(ZOOM_STEP ** event.y, mouse_x - control_panel.width, mouse_y)
+            elif camera is not None and event.type == pygame.MOUSEMOTION and event.buttons[2]:
+                camera.pan(*event.rel)
+            elif camera is not None and event.type == pygame.KEYDOWN and event.key in PAN_KEYS:
+                camera.pan(*PAN_KEYS[event.key])
+            elif camera is not None and event.type == pygame.KEYDOWN and event.key == pygame.K_HOME:
+                camera.reset()
             else:
                 control_panel.handle_event(event)
 
-        # Обновление мира с учетом frame_skip
-        frame_counter += 1
-        if frame_counter >= control_panel.frame_skip:
-            world.update()
-            frame_counter = 0
+        if simulation is not None:
+            # Последний готовый снимок мира; поток тем временем тикает дальше
+            view = simulation.latest()
+            governor.record_ticks(view.tick - shown_tick)
+            shown_tick = view.tick
+        elif control_panel.turbo:
+            # Сколько тиков уложится в кадр, не задерживая ввод и отрисовку
+            control_panel.ticks_per_frame = governor.run(world, control_panel.fps)
+            view = world
+        else:
+            # Обновление мира с учетом frame_skip
+            frame_counter += 1
+            if frame_counter >= control_panel.frame_skip:
+                tick_start = time.perf_counter()
+                world.update()
+                governor.record_ticks(1, time.perf_counter() - tick_start)
+                frame_counter = 0
+            view = world
+
+        # Выборку геномов собирает поток, владеющий миром, отчёт считается в фоне
+        if control_panel.analysis_requested and not analysis.busy:
+            control_panel.analysis_requested = False
+            apply(analysis.request, world)
+        report = analysis.poll()
+        if report is not None:
+            control_panel.update_analysis(report)
+        control_panel.analysis_busy = analysis.busy
+
+        # Профилировщик мира в потоке симуляции меняется на ходу, окно читает его копию из снимка
+        if not profiling:
+            profiler = None
+        elif simulation is not None:
+            profiler = view.profiler
+        else:
+            profiler = world.profiler
 
         # Обновление статистики
-        control_panel.update_stats(world)
-
-        # Очистка экрана
-        screen.fill((0, 0, 0))
-
-        # Создаем подповерхность для игрового мира
-        game_surface = screen.subsurface(pygame.Rect(
-            control_panel.width, 0,
-            WINDOW_WIDTH - control_panel.width, WINDOW_HEIGHT
-        ))
+        start = time.perf_counter()
+        control_panel.update_stats(view)
+        stats_done = time.perf_counter()
 
         # Отрисовка мира и панели управления
-        world.draw(game_surface, control_panel)
+        if camera is not None:
+            renderer.draw(view, game_surface, control_panel, camera)
+            dirty_rects = [game_rect]
+        elif isinstance(renderer, PixelRenderer):
+            renderer.draw(view, game_surface, control_panel)
+            dirty_rects = [game_rect]
+        else:
+            dirty_rects = renderer.draw(control_panel)
+
+        draw_done = time.perf_counter()
+        if profiler is not None:
+            profiler.record('stats', stats_done - start)
+            profiler.record('draw', draw_done - stats_done)
+        tick_time = simulation.tick_time if simulation is not None else governor.tick_time
+        control_panel.update_speed(governor.ticks_per_sec, tick_time, governor.draw_time)
+        control_panel.update_profile(profiler)
         control_panel.draw(screen)
+        dirty_rects.append(panel_rect)
 
-        pygame.display.flip()
+        pygame.display.update(dirty_rects)
+        # Всё время кадра кроме тиков — бюджет, который турбо оставляет окну
+        governor.record_draw(time.perf_counter() - start)
         clock.tick(control_panel.fps)
 
+    if simulation is not None:
+        simulation.stop()
+    analysis.close()
     pygame.quit()
 
 
@@ -0,0 +1,150 @@
+"""Параллельный тик ArrayWorld по вертикальным полосам сетки.
+
+Сетка делится на полосы по числу процессов, массивы мира лежат в
+разделяемой памяти. Тик идёт в две фазы:
+
+1. Каждый процесс выполняет act() для клеток внутренней части своей
+   полосы. Клетка действует только на соседние клетки, поэтому всё, что
+   читает и меняет процесс, остаётся в пределах его полосы, и процессы
+   не пересекаются.
+2. Основной процесс выполняет act() для клеток пограничных столбцов
+   (по одному с каждой стороны внутренней границы) уже по результатам
+   первой фазы: ходы, атаки, передача энергии и размножение через
+   границу разрешаются здесь, в порядке индексов клеток.
+
+Потомки рождаются в основном процессе в порядке индексов родителей,
+поэтому результат определяется seed и числом процессов.
+"""
+import os
+import types
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from array_world import ArrayWorld, act
+
+# Ширина пограничной полосы с каждой стороны внутренней границы, в столбцах
+HALO = 1
+
+
+# Состояние рабочего процесса: подключённые сегменты текущего поколения массивов
+_worker = {'generation': None, 'segments': [], 'state': None}
+
+
+def _worker_state(generation, layout, meta):
+    if _worker['generation'] != generation:
+        for segment in _worker['segments']:
+            segment.close()
+        segments = []
+        state = types.SimpleNamespace(**meta)
+        for name, segment_name, shape, dtype in layout:
+            segment = shared_memory.SharedMemory(name=segment_name)
+            segments.append(segment)
+            setattr(state, name, np.ndarray(shape, dtype=dtype, buffer=segment.buf))
+        _worker.update(generation=generation, segments=segments, state=state)
+    return _worker['state']
+
+
+def _act_strip(task):
+    """Первая фаза тика для внутренней части одной полосы."""
+    generation, layout, meta, size, low, high = task
+    state = _worker_state(generation, layout, meta)
+    x = state.x[:size]
+    cells = np.flatnonzero((x >= low) & (x < high) & state.alive[:size])
+    return act(state, cells)
+
+
+class ParallelArrayWorld(ArrayWorld):
+    def __init__(self, width, height, seed=None, config=None, capacity=1024, workers=None):
+        self._segments = {}
+        self._stale_segments = []
+        self._generation = 0
+        self.workers = workers or os.cpu_count()
+        super().__init__(width, height, seed=seed, config=config, capacity=capacity)
+
+        bounds = np.linspace(0, width, self.workers + 1).astype(int)
+        self.strips = []
+        self.border_columns = np.zeros(width, dtype=bool)
+        # В тороидальном мире крайние полосы тоже граничат друг с другом
+        wrap = self.config.toroidal and self.workers > 1
+        for low, high in zip(bounds[:-1], bounds[1:]):
+            inner_low = low + HALO if low > 0 or wrap else low
+            inner_high = high - HALO if high < width or wrap else high
+            self.strips.append((int(inner_low), int(max(inner_low, inner_high))))
+            self.border_columns[low:inner_low] = True
+            self.border_columns[max(inner_low, inner_high):high] = True
+        self.pool = Pool(self.workers)
+
+    def _new_array(self, shape, dtype):
+        dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(shape)) * dtype.itemsize)
+        segment = shared_memory.SharedMemory(create=True, size=size)
+        array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+        array.fill(0)
+        self._segments[id(array)] = segment
+        self._generation += 1
+        return array
+
+    def _reserve(self, count):
+        old = self._columns()
+        super()._reserve(count)
+        # Старые массивы скопированы в новые сегменты
+        for name, values in old.items():
+            if getattr(self, name) is not values:
+                self._stale_segments.append(self._segments.pop(id(values)))
+        self._release_stale()
+
+    def _release_stale(self):
+        for segment in self._stale_segments:
+            segment.close()
+            segment.unlink()
+        self._stale_segments = []
+
+    def _layout(self):
+        arrays = dict(self._columns(), grid=self.grid)
+        return [(name, self._segments[id(values)].name, values.shape, values.dtype.str)
+                for name, values in arrays.items()]
+
+    def update(self):
+        n = self.size
+        # Какие клетки в пограничных столбцах — по положению на начало тика
+        border = self.border_columns[self.x[:n]]
+
+        meta = {
+            'width': self.width,
+            'height': self.height,
+            'config': self.config,
+            'max_energy': self.max_energy,
+        }
+        layout = self._layout()
+        tasks = [(self._generation, layout, meta, n, low, high) for low, high in self.strips]
+        results = self.pool.map(_act_strip, tasks)
+
+        border_cells = np.flatnonzero(border & self.alive[:n])
+        results.append(act(self, border_cells))
+
+        parents = np.concatenate([result[0] for result in results])
+        birth_energy = np.concatenate([result[1] for result in results])
+        order = np.argsort(parents, kind='stable')
+        self._finish_tick(n, (parents[order], birth_energy[order]))
+
+    def close(self):
+        """Останавливает процессы и освобождает разделяемую память."""
+        if self.pool is not None:
+            # Между тиками у процессов нет задач, а после прерванного map
+            # close() и join() ждали бы их вечно
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        # Массивы ссылаются на память сегментов, сначала отпускаем их
+        for name in list(self._columns()) + ['grid']:
+            setattr(self, name, None)
+        self._stale_segments.extend(self._segments.values())
+        self._segments = {}
+        self._release_stale()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
\ No newline at end of file
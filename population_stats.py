@@ -0,0 +1,124 @@
+"""Счётчики популяции, которые мир обновляет при рождении и гибели клеток.
+
+Панель управления и экспорт читают готовые значения, не обходя
+список клеток на каждом кадре.
+"""
+import heapq
+
+import numpy as np
+
+from cell_type import CellType
+
+AGE_BUCKET_SIZE = 100
+AGE_BUCKETS = 10  # Последняя корзина — возраст от 900 и старше
+
+
+def age_bucket(age):
+    return min(age // AGE_BUCKET_SIZE, AGE_BUCKETS - 1)
+
+
+class PopulationStats:
+    def __init__(self):
+        self.type_counts = [0] * len(CellType)
+        self.total_energy = 0.0
+        self.age_buckets = [0] * AGE_BUCKETS
+        self.clan_sizes = {}
+        self.births = 0
+        self.deaths = 0
+        # Рождения и гибель за последний тик
+        self.tick_births = 0
+        self.tick_deaths = 0
+
+    @property
+    def total(self):
+        return sum(self.type_counts)
+
+    @property
+    def mean_energy(self):
+        total = self.total
+        return self.total_energy / total if total else 0.0
+
+    @property
+    def clan_count(self):
+        return len(self.clan_sizes)
+
+    def count(self, cell_type):
+        return self.type_counts[cell_type.value]
+
+    def top_clans(self, count=5):
+        """Самые многочисленные кланы: список пар (клан, размер)."""
+        return heapq.nlargest(count, self.clan_sizes.items(), key=lambda item: item[1])
+
+    def begin_tick(self):
+        self.tick_births = 0
+        self.tick_deaths = 0
+
+    def add(self, cell, birth=True):
+        self.type_counts[cell.cell_type.value] += 1
+        self.total_energy += cell.energy
+        self.age_buckets[age_bucket(cell.age)] += 1
+        self.clan_sizes[cell.clan_id] = self.clan_sizes.get(cell.clan_id, 0) + 1
+        if birth:
+            self.births += 1
+            self.tick_births += 1
+
+    def add_many(self, cell_types, energy, clan_ids, ages=None):
+        """add(cell, birth=False) для клеток, заданных массивами; без ages все клетки новые."""
+        for value, count in enumerate(np.bincount(cell_types, minlength=len(CellType)).tolist()):
+            self.type_counts[value] += count
+        self.total_energy += float(np.sum(energy))
+        if ages is None:
+            self.age_buckets[0] += len(cell_types)
+        else:
+            buckets = np.minimum(np.asarray(ages) // AGE_BUCKET_SIZE, AGE_BUCKETS - 1)
+            for bucket, count in enumerate(np.bincount(buckets, minlength=AGE_BUCKETS).tolist()):
+                self.age_buckets[bucket] += count
+        clans, sizes = np.unique(clan_ids, return_counts=True)
+        clan_sizes = self.clan_sizes
+        for clan_id, size in zip(clans.tolist(), sizes.tolist()):
+            clan_sizes[clan_id] = clan_sizes.get(clan_id, 0) + size
+
+    def remove(self, cell):
+        self.type_counts[cell.cell_type.value] -= 1
+        self.total_energy -= cell.energy
+        self.age_buckets[age_bucket(cell.age)] -= 1
+        size = self.clan_sizes[cell.clan_id] - 1
+        if size:
+            self.clan_sizes[cell.clan_id] = size
+        else:
+            del self.clan_sizes[cell.clan_id]
+        self.deaths += 1
+        self.tick_deaths += 1
+
+    def aged(self, age):
+        """Клетка достигла возраста age; вызывается, когда age кратен AGE_BUCKET_SIZE."""
+        new_bucket = age_bucket(age)
+        old_bucket = age_bucket(age - 1)
+        if new_bucket != old_bucket:
+            self.age_buckets[old_bucket] -= 1
+            self.age_buckets[new_bucket] += 1
+
+    def summary(self):
+        """Все счётчики, кроме размеров кланов, одним словарём."""
+        return {
+            'total': self.total,
+            'types': {cell_type.name: self.type_counts[cell_type.value] for cell_type in CellType},
+            'total_energy': self.total_energy,
+            'mean_energy': self.mean_energy,
+            'age_buckets': list(self.age_buckets),
+            'clans': self.clan_count,
+            'births': self.tick_births,
+            'deaths': self.tick_deaths,
+        }
+
+    @classmethod
+    def from_arrays(cls, state):
+        """Строит счётчики по массивам состояния (world.state_arrays())."""
+        stats = cls()
+        stats.type_counts = np.bincount(state['cell_type'], minlength=len(CellType)).tolist()
+        stats.total_energy = float(state['energy'].sum())
+        ages = np.minimum(state['age'] // AGE_BUCKET_SIZE, AGE_BUCKETS - 1)
+        stats.age_buckets = np.bincount(ages, minlength=AGE_BUCKETS).tolist()
+        clans, sizes = np.unique(state['clan_id'], return_counts=True)
+        stats.clan_sizes = dict(zip(clans.tolist(), sizes.tolist()))
+        return stats
\ No newline at end of file
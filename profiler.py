@@ -0,0 +1,93 @@
+"""Профилировщик тика World: время и число вызовов по видам действий клеток.
+
+Включается World.enable_profiling(). Выключенный профилировщик ничего
+не стоит: мир вызывает обработчики действий через свою таблицу
+world.actions, и только включение подменяет её обёртками с замером
+времени.
+
+Время действия считается без вложенных замеров: удаление клетки,
+вызванное атакой, попадает только в REMOVE, а не ещё и в ATTACK."""
+import time
+
+from genome_program import Action
+
+# Разделы кадра, которые меряются вне World.update
+FRAME_SECTIONS = ('update', 'draw', 'stats')
+
+
+class TickProfiler:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        kinds = [action.name for action in Action if action] + ['REMOVE']
+        self.calls = dict.fromkeys(kinds, 0)
+        self.times = dict.fromkeys(kinds, 0.0)
+        self.frame_times = dict.fromkeys(FRAME_SECTIONS, 0.0)
+        self.last_frame = dict.fromkeys(FRAME_SECTIONS, 0.0)
+        self.ticks = 0
+        self.frames = dict.fromkeys(FRAME_SECTIONS, 0)
+        self.tick_births = 0
+        self.tick_deaths = 0
+        # Время вложенных замеров, накопленное внутри текущего замера
+        self._nested = [0.0]
+
+    def timed(self, kind, handler):
+        """Обёртка над handler, накапливающая число вызовов и собственное время под именем kind."""
+        calls = self.calls
+        times = self.times
+        nested = self._nested
+        clock = time.perf_counter
+
+        def wrapper(*args):
+            outer = nested[0]
+            nested[0] = 0.0
+            start = clock()
+            result = handler(*args)
+            elapsed = clock() - start
+            times[kind] += elapsed - nested[0]
+            nested[0] = outer + elapsed
+            calls[kind] += 1
+            return result
+        return wrapper
+
+    def wrap_actions(self, actions):
+        """Таблица обработчиков по индексу Action с замером каждого действия."""
+        return tuple(self.timed(Action(index).name, handler) if handler else None
+                     for index, handler in enumerate(actions))
+
+    def record(self, section, seconds):
+        """Время одного раздела кадра: update, draw или stats."""
+        self.frame_times[section] += seconds
+        self.last_frame[section] = seconds
+        self.frames[section] += 1
+
+    def end_tick(self, world, seconds):
+        self.record('update', seconds)
+        self.ticks += 1
+        self.tick_births = world.stats.tick_births
+        self.tick_deaths = world.stats.tick_deaths
+
+    def mean_ms(self, section):
+        """Среднее время раздела кадра с последнего reset, мс."""
+        frames = self.frames[section]
+        return self.frame_times[section] * 1000 / frames if frames else 0.0
+
+    def top_actions(self, n=None):
+        """Виды действий по убыванию общего времени: (имя, вызовов за тик, мс за тик)."""
+        ticks = max(self.ticks, 1)
+        rows = [(kind, self.calls[kind] / ticks, self.times[kind] * 1000 / ticks)
+                for kind in self.calls if self.calls[kind]]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:n] if n is not None else rows
+
+    def summary(self):
+        return {
+            'ticks': self.ticks,
+            'actions': {kind: {'calls_per_tick': calls, 'ms_per_tick': ms}
+                        for kind, calls, ms in self.top_actions()},
+            'frame_ms': {section: self.mean_ms(section) for section in FRAME_SECTIONS},
+            'last_frame_ms': {section: seconds * 1000 for section, seconds in self.last_frame.items()},
+            'tick_births': self.tick_births,
+            'tick_deaths': self.tick_deaths,
+        }
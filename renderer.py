@@ -0,0 +1,283 @@
+import numpy as np
+import pygame
+
+from array_world import DIRECTION_DX, DIRECTION_DY
+from cell_type import CELL_COLORS, CellType
+from config import *
+from directions import DIRECTION_OFFSETS
+from lod import LOD_TILES, ArrayTileLevel, attach_tiles, choose_tile
+from settings_ui import DisplayMode, energy_color
+
+GRID_COLOR = (40, 40, 40)
+# Приближение (пикселей на блок), начиная с которого камера рисует отдельные клетки
+DETAIL_ZOOM = 3
+
+TYPE_PALETTE = np.array([CELL_COLORS[cell_type] for cell_type in CellType], dtype=np.uint8)
+ENERGY_PALETTE = np.array([energy_color(level / 255) for level in range(256)], dtype=np.uint8)
+
+
+def get_block_rect(block):
+    """Возвращает прямоугольник блока на игровом поле."""
+    return get_square_rect(block.x, block.y)
+
+
+def get_square_rect(x, y):
+    return pygame.Rect(
+        x * BLOCK_SIZE,
+        y * BLOCK_SIZE,
+        BLOCK_SIZE,
+        BLOCK_SIZE
+    )
+
+
+def draw_cell(surface, cell, color):
+    center = (
+        cell.block.x * BLOCK_SIZE + BLOCK_SIZE // 2,
+        cell.block.y * BLOCK_SIZE + BLOCK_SIZE // 2
+    )
+
+    # Рисуем круг с полученным цветом
+    # pygame.draw.circle(surface, color, center, BLOCK_SIZE // 2 - 1)
+    # Рисуем квадрат с полученным цветом
+    pygame.draw.rect(surface,
+                     color,
+                     pygame.Rect(center[0] - BLOCK_SIZE // 2,
+                                 center[1] - BLOCK_SIZE // 2,
+                                 BLOCK_SIZE - 1,
+                                 BLOCK_SIZE - 1))
+
+    # Рисуем направление
+    direction_offset = DIRECTION_OFFSETS[cell.direction]
+    end_point = (
+        center[0] + direction_offset[0] * (BLOCK_SIZE // 3),
+        center[1] + direction_offset[1] * (BLOCK_SIZE // 3)
+    )
+    # Линия шириной 2 не должна залезать на соседний блок: иначе при
+    # перерисовке одного блока на соседях остаются следы
+    clip = surface.get_clip()
+    surface.set_clip(get_block_rect(cell.block).clip(clip))
+    pygame.draw.line(surface, (255, 255, 255), center, end_point, 2)
+    surface.set_clip(clip)
+
+
+def draw_block(surface, block, settings=None):
+    pygame.draw.rect(surface, GRID_COLOR, get_block_rect(block), 1)
+    if block.cell:
+        color = settings.get_cell_color(block.cell) if settings else block.cell.color
+        draw_cell(surface, block.cell, color)
+
+
+def draw_world(world, surface, settings=None):
+    """Полная отрисовка мира. Вся работа с pygame вынесена сюда, чтобы
+    симуляция (World, Block, Cell) запускалась без дисплея."""
+    surface.blit(render_background(world, surface.get_size()), (0, 0))
+    for cell in world.cells:
+        if cell is not None:
+            color = settings.get_cell_color(cell) if settings else cell.color
+            draw_cell(surface, cell, color)
+
+def render_background(world, size):
+    """Фон игрового поля с сеткой, рисуется один раз."""
+    background = pygame.Surface(size)
+    background.fill((0, 0, 0))
+    for x in range(world.width):
+        for y in range(world.height):
+            pygame.draw.rect(background, GRID_COLOR, get_square_rect(x, y), 1)
+    return background
+
+
+class IncrementalRenderer:
+    """Перерисовывает только блоки, изменившиеся с прошлого кадра.
+
+    Фон с сеткой кэшируется, мир собирает изменённые блоки в
+    world.dirty_blocks (ходы, рождения, гибель, повороты, смена
+    градации энергии), а draw возвращает прямоугольники экрана для
+    pygame.display.update."""
+
+    def __init__(self, world, surface):
+        self.world = world
+        self.surface = surface
+        self.offset = surface.get_abs_offset()
+        self.background = render_background(world, surface.get_size())
+        self.display_mode = None
+        self.full_redraw = True
+        world.dirty_blocks = set()
+
+    def invalidate(self):
+        """Запрашивает полную перерисовку на следующем кадре."""
+        self.full_redraw = True
+
+    def draw(self, settings=None):
+        mode = settings.display_mode if settings else None
+        if self.full_redraw or mode != self.display_mode:
+            return self._draw_all(settings, mode)
+
+        rects = []
+        for block in self.world.dirty_blocks:
+            rect = get_block_rect(block)
+            self.surface.blit(self.background, rect, rect)
+            if block.cell:
+                color = settings.get_cell_color(block.cell) if settings else block.cell.color
+                draw_cell(self.surface, block.cell, color)
+            rects.append(rect.move(self.offset))
+        self.world.dirty_blocks.clear()
+        return rects
+
+    def _draw_all(self, settings, mode):
+        self.surface.blit(self.background, (0, 0))
+        for cell in self.world.cells:
+            color = settings.get_cell_color(cell) if settings else cell.color
+            draw_cell(self.surface, cell, color)
+        self.world.dirty_blocks.clear()
+        self.display_mode = mode
+        self.full_redraw = False
+        return [self.surface.get_rect().move(self.offset)]
+
+
+def state_colors(world, state, settings):
+    """Цвета клеток по массивам состояния в текущем режиме отображения."""
+    mode = settings.display_mode if settings else DisplayMode.TYPES
+    if mode == DisplayMode.ENERGY:
+        max_energy = np.array([world.config.max_energy(cell_type) for cell_type in CellType], dtype=np.float64)
+        normalized = state['energy'] / max_energy[state['cell_type']]
+        levels = np.clip(normalized * 255, 0, 255).astype(np.intp)
+        return ENERGY_PALETTE[levels]
+    elif mode == DisplayMode.CLANS:
+        return clan_colors(state['clan_id'], settings)
+    return TYPE_PALETTE[state['cell_type']]
+
+
+def clan_colors(clan_ids, settings):
+    """Цвета кланов массивом; панель считает их векторно, без цикла по кланам."""
+    return settings.get_clan_colors(clan_ids)
+
+
+class PixelRenderer:
+    """Отрисовка мира через буфер пикселей: один пиксель на блок.
+
+    Цвета всех клеток вычисляются векторно по массивам состояния мира
+    (world.state_arrays()) и палитрам, буфер копируется в поверхность
+    через pygame.surfarray и выводится одним масштабированным blit.
+    Работает и с World, и с ArrayWorld."""
+
+    def __init__(self, width, height, block_size=BLOCK_SIZE, show_directions=False):
+        self.width = width
+        self.height = height
+        self.block_size = block_size
+        self.show_directions = show_directions
+        self.buffer = np.zeros((width, height, 3), dtype=np.uint8)
+        self.pixels = pygame.Surface((width, height))
+        self.scaled = pygame.Surface((width * block_size, height * block_size))
+
+    def draw(self, world, surface, settings=None):
+        state = world.state_arrays()
+        self.buffer.fill(0)
+        self.buffer[state['x'], state['y']] = self._colors(world, state, settings)
+
+        pygame.surfarray.blit_array(self.pixels, self.buffer)
+        pygame.transform.scale(self.pixels, self.scaled.get_size(), self.scaled)
+        surface.blit(self.scaled, (0, 0))
+
+        if self.show_directions:
+            self._draw_directions(surface, state)
+
+    def _colors(self, world, state, settings):
+        return state_colors(world, state, settings)
+
+    def _draw_directions(self, surface, state):
+        half = self.block_size // 2
+        length = self.block_size // 3
+        centers_x = state['x'] * self.block_size + half
+        centers_y = state['y'] * self.block_size + half
+        ends_x = centers_x + DIRECTION_DX[state['direction']] * length
+        ends_y = centers_y + DIRECTION_DY[state['direction']] * length
+        for line in zip(centers_x.tolist(), centers_y.tolist(), ends_x.tolist(), ends_y.tolist()):
+            pygame.draw.line(surface, (255, 255, 255), line[:2], line[2:], 1)
+
+
+class CameraRenderer:
+    """Отрисовка видимой через камеру (camera.Camera) части мира.
+
+    При приближении от DETAIL_ZOOM рисуются клетки видимых блоков, издалека —
+    плитки уровня детализации: преобладающий тип или клан с яркостью по
+    плотности, а в режиме энергии — карта плотности. Работа кадра зависит
+    от размера вида, а не мира: сводки по плиткам (world.tiles)
+    подключаются при первом кадре и дальше ведутся самим миром, снимок
+    WorldView несёт их копии. Только для миров без сводок (RemoteWorld)
+    уровень строится по массивам состояния."""
+
+    def draw(self, world, surface, settings, camera):
+        surface.fill((0, 0, 0))
+        if camera.zoom >= DETAIL_ZOOM:
+            self._draw_cells(world, surface, settings, camera)
+        else:
+            self._draw_tiles(world, surface, settings, camera)
+
+    def _draw_cells(self, world, surface, settings, camera):
+        x0, y0, x1, y1 = camera.visible()
+        buffer = np.zeros((x1 - x0, y1 - y0, 3), dtype=np.uint8)
+        if hasattr(world, 'cells'):
+            for cell in self._visible_cells(world, x0, y0, x1, y1):
+                color = settings.get_cell_color(cell) if settings else cell.color
+                buffer[cell.block.x - x0, cell.block.y - y0] = color
+        else:
+            state = world.state_arrays()
+            inside = (state['x'] >= x0) & (state['x'] < x1) & (state['y'] >= y0) & (state['y'] < y1)
+            visible = {name: values[inside] for name, values in state.items()}
+            buffer[visible['x'] - x0, visible['y'] - y0] = state_colors(world, visible, settings)
+        self._blit(surface, buffer, camera, x0, y0, 1)
+
+    def _visible_cells(self, world, x0, y0, x1, y1):
+        """Клетки World в области; пустые плитки мелкого уровня пропускаются."""
+        tiles = attach_tiles(world)
+        level = tiles.levels[tiles.tiles[0]]
+        size = level.size
+        tx0, ty0 = x0 // size, y0 // size
+        occupied = level.view(tx0, ty0, -(-x1 // size), -(-y1 // size)).sum(axis=2)
+        for tx, ty in np.argwhere(occupied).tolist():
+            left = (tx0 + tx) * size
+            top = (ty0 + ty) * size
+            for x in range(max(x0, left), min(x1, left + size)):
+                for y in range(max(y0, top), min(y1, top + size)):
+                    cell = world.grid.cell_at(x, y)
+                    if cell is not None:
+                        yield cell
+
+    def _draw_tiles(self, world, surface, settings, camera):
+        tiles = getattr(world, 'tiles', None)
+        if tiles is None and not hasattr(world, 'update'):
+            # Снимок без сводок или RemoteWorld: уровень строится по массивам состояния
+            size = choose_tile(LOD_TILES, camera.zoom)
+            level = ArrayTileLevel.from_state(world.state_arrays(), world.width, world.height, size)
+        else:
+            level = attach_tiles(world).level(camera.zoom)
+
+        size = level.size
+        x0, y0, x1, y1 = camera.visible()
+        tx0, ty0, tx1, ty1 = x0 // size, y0 // size, -(-x1 // size), -(-y1 // size)
+        counts = level.view(tx0, ty0, tx1, ty1)
+        total = counts.sum(axis=2)
+        density = np.minimum(total / (size * size), 1.0)
+
+        mode = settings.display_mode if settings else DisplayMode.TYPES
+        if mode == DisplayMode.ENERGY:
+            colors = ENERGY_PALETTE[(density * 255).astype(np.intp)]
+        else:
+            if mode == DisplayMode.CLANS:
+                colors = clan_colors(level.dominant_clans(tx0, ty0, tx1, ty1), settings)
+            else:
+                colors = TYPE_PALETTE[counts.argmax(axis=2)]
+            # Редко заселённые плитки темнее
+            colors = (colors * (0.3 + 0.7 * np.sqrt(density))[..., None]).astype(np.uint8)
+        colors[total == 0] = 0
+        self._blit(surface, colors, camera, tx0 * size, ty0 * size, size)
+
+    def _blit(self, surface, buffer, camera, x0, y0, size):
+        """Выводит буфер, пиксель которого — квадрат size x size блоков с левым верхним углом мира в (x0, y0)."""
+        if buffer.size == 0:
+            return
+        scale = size * camera.zoom
+        width = max(1, round(buffer.shape[0] * scale))
+        height = max(1, round(buffer.shape[1] * scale))
+        image = pygame.transform.scale(pygame.surfarray.make_surface(buffer), (width, height))
+        surface.blit(image, (round((x0 - camera.x) * camera.zoom), round((y0 - camera.y) * camera.zoom)))
@@ -0,0 +1,124 @@
+"""Массовое заселение мира (World.populate и ArrayWorld.populate).
+
+Вместо цикла add_cell со случайными координатами и отбрасыванием
+занятых мест все клетки заселения разыгрываются разом: различные
+свободные клетки поля, типы, направления и геномы — одним вызовом
+генератора мира на каждый массив. Движку остаётся только перенести
+готовые массивы в своё состояние.
+
+Геномы берутся случайные (у хищников, как и в add_cell, заблокирован
+фотосинтез) или из пула: матрица (N, 64), список строк байтов или
+словарь {тип клетки: пул}. Пул из сохранённой популяции строит
+population_pool. Клетки с одинаковым геномом из пула получают общий
+клан, случайные — каждая свой.
+"""
+import numpy as np
+
+from cell_type import CellType
+from genome_program import GENOME_LENGTH
+from snapshot import read_snapshot
+
+# Запас случайных номеров клеток поля при розыгрыше, на совпадения и занятые места
+OVERSAMPLING = 1.1
+
+
+def population_pool(path):
+    """Геномы клеток сохранённой популяции по типам: {тип клетки: матрица (N, 64)}.
+
+    Геном повторяется столько раз, сколько у него было носителей, поэтому
+    выборка из пула сохраняет частоты геномов."""
+    _, arrays = read_snapshot(path)
+    genomes = arrays['genomes'][arrays['genome_index']]
+    cell_types = arrays['cell_type']
+    return {cell_type: genomes[cell_types == cell_type.value] for cell_type in CellType
+            if (cell_types == cell_type.value).any()}
+
+
+def _as_matrix(pool):
+    if isinstance(pool, np.ndarray):
+        return pool.astype(np.uint8, copy=False).reshape(-1, GENOME_LENGTH)
+    return np.frombuffer(b''.join(bytes(genome) for genome in pool), dtype=np.uint8).reshape(-1, GENOME_LENGTH)
+
+
+def free_squares(generator, width, height, count, occupied):
+    """count различных случайных свободных клеток поля (плоские номера x * height + y).
+
+    occupied — плоские номера занятых клеток."""
+    area = width * height
+    free = area - len(occupied)
+    if count > free:
+        raise ValueError(f'cannot place {count} cells: only {free} free squares')
+    if count * 4 > free:
+        # Плотное заселение: перемешиваем все свободные клетки
+        candidates = np.arange(area, dtype=np.int64)
+        if len(occupied):
+            candidates = np.setdiff1d(candidates, occupied, assume_unique=True)
+        return generator.permutation(candidates)[:count]
+
+    chosen = np.empty(0, dtype=np.int64)
+    while len(chosen) < count:
+        # Доля новых свободных клеток среди розыгрышей падает по мере заселения
+        needed = (count - len(chosen)) * area / (free - len(chosen))
+        draw = generator.integers(0, area, size=int(needed * OVERSAMPLING) + 16)
+        candidates = np.concatenate([chosen, draw])
+        # Повторы отбрасываются, порядок розыгрыша сохраняется
+        _, first = np.unique(candidates, return_index=True)
+        candidates = candidates[np.sort(first)]
+        if len(occupied):
+            candidates = candidates[~np.isin(candidates, occupied)]
+        chosen = candidates[:count]
+    return chosen
+
+
+def plan_population(world, counts=None, density=None, genomes=None):
+    """Разыгрывает заселение и возвращает массивы новых клеток.
+
+    counts — {тип клетки: число клеток}, density — {тип клетки: доля клеток
+    поля}; genomes — пул геномов (см. описание модуля) или None.
+    Возвращает словарь массивов x, y, cell_type, direction, genomes (n, 64)
+    и founder — номер клана среди founders новых кланов."""
+    counts = dict(counts or {})
+    for cell_type, share in (density or {}).items():
+        counts[cell_type] = counts.get(cell_type, 0) + round(share * world.width * world.height)
+    counts = {cell_type: count for cell_type, count in counts.items() if count > 0}
+    total = sum(counts.values())
+
+    occupied = np.empty(0, dtype=np.int64)
+    if len(world):
+        state = world.state_arrays()
+        occupied = state['x'].astype(np.int64) * world.height + state['y']
+    generator = world.rng.generator
+    squares = free_squares(generator, world.width, world.height, total, occupied)
+    # Клетки поля разыграны в случайном порядке, поэтому типы раздаются подряд
+    cell_type = np.repeat(np.array([cell_type.value for cell_type in counts], dtype=np.int8),
+                          list(counts.values()))
+
+    if genomes is None:
+        matrix = world.rng.genomes(total)
+        # Заблокировать действие фотосинтеза для хищных клеток
+        matrix[cell_type == CellType.PREDATOR.value, 25:33] = 0
+        founder = np.arange(total)
+        founders = total
+    else:
+        pools = genomes if isinstance(genomes, dict) else dict.fromkeys(counts, genomes)
+        matrix = np.empty((total, GENOME_LENGTH), dtype=np.uint8)
+        start = 0
+        for kind, count in counts.items():
+            pool = _as_matrix(pools[kind])
+            if not len(pool):
+                raise ValueError(f'empty genome pool for {kind.name}')
+            matrix[start:start + count] = pool[generator.integers(0, len(pool), size=count)]
+            start += count
+        rows = matrix.view(np.dtype((np.void, GENOME_LENGTH))).ravel()
+        unique, founder = np.unique(rows, return_inverse=True)
+        founders = len(unique)
+
+    return {
+        'x': squares // world.height,
+        'y': squares % world.height,
+        'cell_type': cell_type,
+        'direction': world.rng.directions(total),
+        'genomes': matrix,
+        'founder': founder.ravel(),
+        'founders': founders,
+    }
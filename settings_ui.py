@@ -1,8 +1,13 @@
 import pygame
 from enum import Enum
 import colorsys
+import functools
 
+import numpy as np
+
+from cell_type import CellType
 from config import *
+from population_stats import AGE_BUCKET_SIZE
 
 
 class DisplayMode(Enum):
@@ -11,6 +16,51 @@ class DisplayMode(Enum):
     CLANS = 'Clans'
 
 
+def energy_color(normalized_energy):
+    """Цвет уровня энергии: от чёрного через жёлтый к белому."""
+    normalized_energy = min(max(normalized_energy, 0), 1)
+    if normalized_energy <= 0.5:
+        r = g = 255 * (normalized_energy * 2)
+        b = 0
+    else:
+        r = g = 255
+        b = 255 * ((normalized_energy - 0.5) * 2)
+    return (int(r), int(g), int(b))
+
+
+# Сколько цветов кланов держит кэш; давно не встречавшиеся кланы вытесняются
+CLAN_COLOR_CACHE = 4096
+
+
+# Номера v, p, q, t в каналах r, g, b для шести секторов оттенка (как в colorsys.hsv_to_rgb)
+HSV_SECTORS = np.array([(0, 3, 1), (2, 0, 1), (1, 0, 3), (1, 2, 0), (3, 1, 0), (0, 1, 2)])
+
+
+@functools.lru_cache(maxsize=CLAN_COLOR_CACHE)
+def clan_color(clan_id):
+    hue = (clan_id * 0.618033988749895) % 1
+    rgb = colorsys.hsv_to_rgb(hue, 0.8, 0.95)
+    return tuple(int(x * 255) for x in rgb)
+
+
+def clan_palette(clan_ids):
+    """Цвета clan_color для массива кланов: массив (..., 3) uint8 с теми же значениями."""
+    hue = (np.asarray(clan_ids, dtype=np.int64) * 0.618033988749895) % 1
+    # colorsys.hsv_to_rgb над массивом: сектор цветового круга выбирает, какие из v, p, q, t идут в r, g, b
+    sector = (hue * 6.0).astype(np.intp)
+    f = hue * 6.0 - sector
+    value, saturation = 0.95, 0.8
+    channels = np.stack([np.full_like(hue, value), np.full_like(hue, value * (1.0 - saturation)),
+                         value * (1.0 - saturation * f), value * (1.0 - saturation * (1.0 - f))], axis=-1)
+    rgb = np.take_along_axis(channels, HSV_SECTORS[sector % 6], axis=-1)
+    return (rgb * 255).astype(np.uint8)
+
+
+# Строк в нижней секции: профилировщик (заголовок, время статистики, самые дорогие
+# действия), а когда он выключен — последний анализ генофонда
+PROFILE_LINES = 5
+
+
 class ControlPanel:
     def __init__(self, width=200):
         self.width = width
@@ -18,6 +68,15 @@ class ControlPanel:
         self.display_mode = DisplayMode.TYPES
         self.fps = FPS
         self.frame_skip = 0
+        # Турбо: тиков за кадр столько, сколько укладывается в бюджет кадра (governor.TurboGovernor)
+        self.turbo = False
+        self.ticks_per_frame = 1
+        # Frame Skip и Turbo управляют тиками в цикле окна; когда тикает не окно, их нет
+        self.tick_controls = True
+        # Кнопка Analyse ставит запрос, цикл окна передаёт его analytics.BackgroundAnalysis
+        self.analysis_requested = False
+        self.analysis_busy = False
+        self.analysis_lines = []
 
         # Цвета
         self.bg_color = (30, 30, 30)
@@ -36,15 +95,13 @@ class ControlPanel:
         self.labels = {}
         self._create_controls()
 
-        # Кэш цветов для кланов
-        self.clan_colors = {}
-
         # Статистика
         self.stats = {
             'total_cells': 0,
             'photosynthetic': 0,
             'predators': 0
         }
+        self.stats_tick = None
 
     def _create_controls(self):
         y = self.padding
@@ -64,8 +121,9 @@ class ControlPanel:
         y += 25
 
         self.buttons['skip_down'] = pygame.Rect(self.padding, y, 30, self.button_height)
-        self.buttons['skip_value'] = pygame.Rect(45, y, 70, self.button_height)
-        self.buttons['skip_up'] = pygame.Rect(120, y, 30, self.button_height)
+        self.buttons['skip_value'] = pygame.Rect(45, y, 50, self.button_height)
+        self.buttons['skip_up'] = pygame.Rect(100, y, 30, self.button_height)
+        self.buttons['turbo'] = pygame.Rect(135, y, self.width - 135 - self.padding, self.button_height)
 
         y += self.button_height + self.section_margin
 
@@ -86,49 +144,116 @@ class ControlPanel:
 
         # Секция статистики
         self.labels['stats'] = {'text': 'Statistics', 'pos': (self.padding, y)}
+        self.buttons['analyse'] = pygame.Rect(self.width - self.padding - 80, y - 3, 80, 22)
         y += 25
         self.labels['total'] = {'text': 'Total: 0', 'pos': (self.padding, y)}
         y += 20
         self.labels['photo'] = {'text': 'Plant: 0', 'pos': (self.padding, y)}
         y += 20
         self.labels['pred'] = {'text': 'Predator: 0', 'pos': (self.padding, y)}
+        y += 20
+        self.labels['energy'] = {'text': 'Energy avg: 0', 'pos': (self.padding, y)}
+        y += 20
+        self.labels['clans'] = {'text': 'Clans: 0', 'pos': (self.padding, y)}
+        y += 20
+        self.labels['births'] = {'text': 'Births/tick: 0', 'pos': (self.padding, y)}
+        y += 20
+        self.labels['deaths'] = {'text': 'Deaths/tick: 0', 'pos': (self.padding, y)}
+        y += 20
+        self.labels['ages'] = {'text': 'Age 0-99: 0', 'pos': (self.padding, y)}
+        y += 20 + self.section_margin
+
+        # Скорость симуляции
+        self.labels['speed'] = {'text': 'Ticks/sec: 0', 'pos': (self.padding, y)}
+        y += 20
+        self.labels['timing'] = {'text': 'Tick 0.0 Draw 0.0 ms', 'pos': (self.padding, y)}
+        y += 20 + self.section_margin
+
+        # Секция профилировщика или анализа генофонда
+        self.profile_labels = []
+        for i in range(PROFILE_LINES):
+            name = f'profile_{i}'
+            self.labels[name] = {'text': '', 'pos': (self.padding, y)}
+            self.profile_labels.append(name)
+            y += 20
 
     def get_game_rect(self, screen_height):
         """Возвращает прямоугольник для игрового поля"""
         return pygame.Rect(self.width, 0, screen_height, screen_height)
 
     def get_clan_color(self, clan_id):
-        if clan_id not in self.clan_colors:
-            hue = (clan_id * 0.618033988749895) % 1
-            rgb = colorsys.hsv_to_rgb(hue, 0.8, 0.95)
-            self.clan_colors[clan_id] = tuple(int(x * 255) for x in rgb)
-        return self.clan_colors[clan_id]
+        return clan_color(clan_id)
+
+    def get_clan_colors(self, clan_ids):
+        return clan_palette(clan_ids)
 
     def get_cell_color(self, cell):
         if self.display_mode == DisplayMode.TYPES:
             return cell.color
         elif self.display_mode == DisplayMode.ENERGY:
-            normalized_energy = min(max(cell.energy / cell.max_energy, 0), 1)
-            if normalized_energy <= 0.5:
-                r = g = 255 * (normalized_energy * 2)
-                b = 0
-            else:
-                r = g = 255
-                b = 255 * ((normalized_energy - 0.5) * 2)
-            return (int(r), int(g), int(b))
+            return energy_color(cell.energy / cell.max_energy)
         else:  # DisplayMode.CLANS
             return self.get_clan_color(cell.clan_id)
 
     def update_stats(self, world):
-        """Обновляет статистику мира"""
-        self.stats['total_cells'] = len(world.cells)
-        self.stats['photosynthetic'] = sum(1 for cell in world.cells if cell.cell_type.name == 'PHOTOSYNTHETIC')
-        self.stats['predators'] = sum(1 for cell in world.cells if cell.cell_type.name == 'PREDATOR')
+        """Обновляет статистику мира по его счётчикам; без нового тика ничего не делает"""
+        if world.tick == self.stats_tick:
+            return
+        self.stats_tick = world.tick
+
+        stats = world.stats
+        self.stats['total_cells'] = stats.total
+        self.stats['photosynthetic'] = stats.count(CellType.PHOTOSYNTHETIC)
+        self.stats['predators'] = stats.count(CellType.PREDATOR)
 
         # Обновляем текст статистики
         self.labels['total']['text'] = f'Total: {self.stats["total_cells"]}'
         self.labels['photo']['text'] = f'Plant: {self.stats["photosynthetic"]}'
         self.labels['pred']['text'] = f'Predator: {self.stats["predators"]}'
+        self.labels['energy']['text'] = f'Energy avg: {stats.mean_energy:.0f}'
+        self.labels['clans']['text'] = f'Clans: {stats.clan_count}'
+        self.labels['births']['text'] = f'Births/tick: {stats.tick_births}'
+        self.labels['deaths']['text'] = f'Deaths/tick: {stats.tick_deaths}'
+        # Самая многочисленная возрастная группа
+        bucket = max(range(len(stats.age_buckets)), key=stats.age_buckets.__getitem__)
+        self.labels['ages']['text'] = (f'Age {bucket * AGE_BUCKET_SIZE}-{(bucket + 1) * AGE_BUCKET_SIZE - 1}: '
+                                       f'{stats.age_buckets[bucket]}')
+
+    def update_speed(self, ticks_per_sec, tick_time, draw_time):
+        """Показывает тики в секунду и время тика и отрисовки кадра (в секундах)."""
+        self.labels['speed']['text'] = f'Ticks/sec: {ticks_per_sec:.0f}'
+        self.labels['timing']['text'] = f'Tick {tick_time * 1000:.1f} Draw {draw_time * 1000:.1f} ms'
+
+    def update_analysis(self, report):
+        """Запоминает строки отчёта analytics.analyse для нижней секции."""
+        mix = report['action_mix']
+        self.analysis_lines = [
+            f'Genomes: {report["distinct_genomes"]}/{report["sampled"]}',
+            f'Diversity: {report["diversity"]:.3f}',
+            f'Photo {mix["PHOTOSYNTHESIS"]:.0%} Attack {mix["ATTACK"]:.0%}',
+            f'Move {mix["MOVE"]:.0%} Repro {mix["REPRODUCE"]:.0%}',
+            f'Clans: {report["clans"]} max {report["largest_clan"]}',
+        ]
+
+    def update_profile(self, profiler):
+        """Показывает время статистики и самые дорогие действия клеток;
+        без профилировщика — последний анализ генофонда."""
+        lines = self.analysis_lines
+        if profiler is not None:
+            lines = []
+            frame = profiler.last_frame
+            lines.append(f'Profile (P), tick {profiler.ticks}')
+            lines.append(f'Stats: {frame["stats"] * 1000:.1f} ms')
+            for kind, calls, ms in profiler.top_actions(PROFILE_LINES - len(lines)):
+                lines.append(f'{kind.lower()} {ms:.2f} ms x{calls:.0f}')
+        for i, name in enumerate(self.profile_labels):
+            self.labels[name]['text'] = lines[i] if i < len(lines) else ''
+
+    def disable_tick_controls(self, reason='simulation thread'):
+        """Убирает Frame Skip и Turbo, когда мир тикает не цикл окна."""
+        self.tick_controls = False
+        self.turbo = False
+        self.labels['skip']['text'] = f'Ticks: {reason}'
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -143,12 +268,18 @@ class ControlPanel:
                 return True
 
             # Frame skip controls
-            elif self.buttons['skip_down'].collidepoint(mouse_pos):
+            elif self.tick_controls and self.buttons['skip_down'].collidepoint(mouse_pos):
                 self.frame_skip = max(1, self.frame_skip - 1)
                 return True
-            elif self.buttons['skip_up'].collidepoint(mouse_pos):
+            elif self.tick_controls and self.buttons['skip_up'].collidepoint(mouse_pos):
                 self.frame_skip = min(10, self.frame_skip + 1)
                 return True
+            elif self.tick_controls and self.buttons['turbo'].collidepoint(mouse_pos):
+                self.turbo = not self.turbo
+                return True
+            elif self.buttons['analyse'].collidepoint(mouse_pos):
+                self.analysis_requested = True
+                return True
 
             # Display mode controls
             for mode in DisplayMode:
@@ -186,17 +317,29 @@ class ControlPanel:
         surface.blit(plus, plus.get_rect(center=self.buttons['fps_up'].center))
 
         # Frame skip controls
-        pygame.draw.rect(surface, self.button_color, self.buttons['skip_down'])
-        pygame.draw.rect(surface, self.button_color, self.buttons['skip_up'])
-        pygame.draw.rect(surface, self.button_color, self.buttons['skip_value'])
-
-        # Текст для Frame Skip
-        skip_text = self.font.render(str(self.frame_skip), True, self.text_color)
-        skip_rect = skip_text.get_rect(center=self.buttons['skip_value'].center)
-        surface.blit(skip_text, skip_rect)
-
-        surface.blit(minus, minus.get_rect(center=self.buttons['skip_down'].center))
-        surface.blit(plus, plus.get_rect(center=self.buttons['skip_up'].center))
+        if self.tick_controls:
+            pygame.draw.rect(surface, self.button_color, self.buttons['skip_down'])
+            pygame.draw.rect(surface, self.button_color, self.buttons['skip_up'])
+            pygame.draw.rect(surface, self.button_color, self.buttons['skip_value'])
+
+            # Текст для Frame Skip; в турбо — тиков за последний кадр
+            skip_value = f'x{self.ticks_per_frame}' if self.turbo else str(self.frame_skip)
+            skip_text = self.font.render(skip_value, True, self.text_color)
+            skip_rect = skip_text.get_rect(center=self.buttons['skip_value'].center)
+            surface.blit(skip_text, skip_rect)
+
+            surface.blit(minus, minus.get_rect(center=self.buttons['skip_down'].center))
+            surface.blit(plus, plus.get_rect(center=self.buttons['skip_up'].center))
+
+            turbo_color = self.active_button_color if self.turbo else self.button_color
+            pygame.draw.rect(surface, turbo_color, self.buttons['turbo'])
+            turbo_text = self.font.render('Turbo', True, self.text_color)
+            surface.blit(turbo_text, turbo_text.get_rect(center=self.buttons['turbo'].center))
+
+        analyse_color = self.active_button_color if self.analysis_busy else self.button_color
+        pygame.draw.rect(surface, analyse_color, self.buttons['analyse'])
+        analyse_text = self.font.render('...' if self.analysis_busy else 'Analyse', True, self.text_color)
+        surface.blit(analyse_text, analyse_text.get_rect(center=self.buttons['analyse'].center))
 
         # Display mode buttons
         for mode in DisplayMode:
@@ -0,0 +1,115 @@
+"""Симуляция в отдельном потоке, независимо от частоты кадров.
+
+Поток крутит world.update() без ограничения или с заданной частотой
+тиков и публикует неизменяемый снимок состояния (WorldView), который
+окно рисует со своей частотой. Снимок собирается, только когда окно
+забрало предыдущий: пока отрисовывается один снимок, поток готовит
+следующий. Ввод пользователя (добавление клеток и т. п.) ставится в
+очередь и выполняется потоком симуляции между тиками, так что мир
+меняет только один поток.
+"""
+import collections
+import copy
+import dataclasses
+import threading
+import time
+
+# Пауза потока, когда в мире не осталось клеток и тикать нечего, с
+PAUSE_IDLE = 0.01
+# Вес нового замера в скользящем среднем времени тика
+TICK_SMOOTHING = 0.2
+
+
+@dataclasses.dataclass(frozen=True)
+class WorldView:
+    """Снимок мира для отрисовки: то, что PixelRenderer и ControlPanel читают у мира."""
+    width: int
+    height: int
+    config: object
+    tick: int
+    stats: object
+    arrays: dict
+    tiles: object = None  # Копии сводок по плиткам (lod.TileSnapshot), если мир их ведёт
+    profiler: object = None  # Копия TickProfiler мира, если профилирование включено
+
+    @classmethod
+    def capture(cls, world):
+        # ArrayWorld отдаёт представления своих массивов, поэтому снимок их копирует
+        arrays = {name: values.copy() for name, values in world.state_arrays().items()}
+        for values in arrays.values():
+            values.flags.writeable = False
+        tiles = world.tiles.snapshot() if world.tiles is not None else None
+        profiler = getattr(world, 'profiler', None)
+        if profiler is not None:
+            profiler = copy.deepcopy(profiler)
+        return cls(world.width, world.height, world.config, world.tick,
+                   copy.deepcopy(world.stats), arrays, tiles, profiler)
+
+    def state_arrays(self):
+        return self.arrays
+
+    def __len__(self):
+        return self.stats.total
+
+
+class SimulationThread(threading.Thread):
+    def __init__(self, world, tick_rate=None):
+        super().__init__(name='simulation', daemon=True)
+        self.world = world
+        self.tick_rate = tick_rate  # Тиков в секунду; None — без ограничения
+        self.inputs = collections.deque()
+        self.error = None
+        self.tick_time = 0.0  # Скользящее среднее одного тика, с
+        self._view = WorldView.capture(world)
+        self._view_taken = threading.Event()
+        self._stopping = threading.Event()
+
+    def submit(self, function, *args):
+        """Ставит вызов function(*args) в очередь потока симуляции."""
+        self.inputs.append((function, args))
+
+    def latest(self):
+        """Последний опубликованный снимок; поток начнёт готовить следующий."""
+        if self.error is not None:
+            raise RuntimeError('simulation thread failed') from self.error
+        self._view_taken.set()
+        return self._view
+
+    def stop(self):
+        self._stopping.set()
+        self.join()
+
+    def run(self):
+        try:
+            self._loop()
+        except Exception as error:
+            self.error = error
+
+    def _loop(self):
+        world = self.world
+        inputs = self.inputs
+        start = time.perf_counter()
+        ticks = 0
+        while not self._stopping.is_set():
+            while inputs:
+                function, args = inputs.popleft()
+                function(*args)
+
+            if len(world):
+                tick_start = time.perf_counter()
+                world.update()
+                elapsed = time.perf_counter() - tick_start
+                self.tick_time += TICK_SMOOTHING * (elapsed - self.tick_time)
+                ticks += 1
+            else:
+                time.sleep(PAUSE_IDLE)
+
+            if self._view_taken.is_set():
+                self._view_taken.clear()
+                self._view = WorldView.capture(world)
+
+            if self.tick_rate:
+                # Ждём момента следующего тика по расписанию от старта
+                delay = start + ticks / self.tick_rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
@@ -0,0 +1,184 @@
+"""Сохранение и загрузка состояния мира в компактный двоичный снимок.
+
+Формат (версия 2):
+    8 байт   сигнатура b'EVOSNAP\\0'
+    2 байта  версия формата (little-endian)
+    4 байта  длина заголовка
+    заголовок в JSON: размеры мира, тик, размер чанка сетки World,
+             параметры симуляции (SimulationConfig), состояние генератора
+             случайных чисел и описание массивов (имя, dtype, форма)
+    тело     массивы подряд, сжатые zlib: массивы клеток и таблица
+             различных геномов (G, 64), на которую клетки ссылаются
+             индексом genome_index
+
+Занятость поля не хранится отдельно: клетки и так несут свои x и y, а
+плотная сетка огромного разреженного поля весила бы больше самих клеток.
+Версия 1 отличалась только плотной сеткой 'grid' в теле и читается
+по-прежнему.
+
+Снимок одинаково читается World и ArrayWorld, поэтому мир можно сохранить
+одним движком и продолжить другим.
+"""
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from config import SimulationConfig
+from genome_program import GENOME_LENGTH
+
+MAGIC = b'EVOSNAP\0'
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+_PREAMBLE = struct.Struct('<8sHI')
+
+CELL_COLUMNS = ('x', 'y', 'energy', 'age', 'direction', 'genome_step', 'cell_type', 'clan_id')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _object_world_arrays(world):
+    state = world.state_arrays()
+    cells = [cell for cell in world.cells if cell is not None]
+    table_index = {}
+    genome_index = np.empty(len(cells), dtype=np.uint32)
+    for i, cell in enumerate(cells):
+        genome_index[i] = table_index.setdefault(cell.genome_id, len(table_index))
+    genomes = np.empty((len(table_index), GENOME_LENGTH), dtype=np.uint8)
+    for genome_id, i in table_index.items():
+        genomes[i] = np.frombuffer(world.genomes.get(genome_id), dtype=np.uint8)
+    return state, genome_index, genomes
+
+
+def _array_world_arrays(world):
+    state = world.state_arrays()
+    rows = np.ascontiguousarray(world.genomes[:world.size]).view(np.dtype((np.void, GENOME_LENGTH))).ravel()
+    unique, genome_index = np.unique(rows, return_inverse=True)
+    genomes = unique.view(np.uint8).reshape(-1, GENOME_LENGTH)
+    return state, genome_index.astype(np.uint32), genomes
+
+
+def save_world(world, path, compress_level=1):
+    """Записывает снимок World или ArrayWorld в файл path."""
+    if hasattr(world, 'cells'):
+        state, genome_index, genomes = _object_world_arrays(world)
+        next_clan_id = world.lineage.next_clan_id
+    else:
+        state, genome_index, genomes = _array_world_arrays(world)
+        next_clan_id = world.next_clan_id
+
+    count = len(genome_index)
+    arrays = [(name, np.ascontiguousarray(state[name])) for name in CELL_COLUMNS]
+    arrays += [('genome_index', genome_index), ('genomes', genomes)]
+
+    stats = world.stats
+    header = {
+        'width': world.width,
+        'height': world.height,
+        'tick': world.tick,
+        # Сетка World с чанками восстанавливается с тем же размером чанка
+        'chunk_size': getattr(world.grid, 'chunk_size', None),
+        'config': world.config.to_dict(),
+        'count': count,
+        'births': stats.births,
+        'deaths': stats.deaths,
+        'next_clan_id': next_clan_id,
+        'rng': world.rng.get_state(),
+        'arrays': [{'name': name, 'dtype': values.dtype.str, 'shape': list(values.shape)} for name, values in arrays],
+    }
+    header_bytes = json.dumps(header).encode()
+    body = zlib.compress(b''.join(values.tobytes() for _, values in arrays), compress_level)
+
+    with open(path, 'wb') as file:
+        file.write(_PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        file.write(body)
+
+
+def read_snapshot(path):
+    """Читает снимок и возвращает (заголовок, словарь массивов)."""
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    if len(data) < _PREAMBLE.size:
+        raise SnapshotError(f'{path}: file is too short')
+    magic, version, header_length = _PREAMBLE.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError(f'{path}: not a world snapshot')
+    if version not in SUPPORTED_VERSIONS:
+        raise SnapshotError(f'{path}: unsupported snapshot version {version}')
+
+    offset = _PREAMBLE.size
+    header = json.loads(data[offset:offset + header_length])
+    body = zlib.decompress(data[offset + header_length:])
+
+    arrays = {}
+    position = 0
+    for spec in header['arrays']:
+        dtype = np.dtype(spec['dtype'])
+        size = int(np.prod(spec['shape'])) * dtype.itemsize
+        arrays[spec['name']] = np.frombuffer(body, dtype=dtype, count=size // dtype.itemsize,
+                                             offset=position).reshape(spec['shape'])
+        position += size
+    return header, arrays
+
+
+def _restore_object_world(world, arrays):
+    world.restore_cells(
+        columns={name: arrays[name] for name in CELL_COLUMNS},
+        genomes=arrays['genomes'],
+        genome_index=arrays['genome_index'],
+    )
+
+
+def _restore_array_world(world, arrays):
+    count = len(arrays['genome_index'])
+    world._reserve(count)
+    for name in CELL_COLUMNS:
+        getattr(world, name)[:count] = arrays[name]
+    world.genomes[:count] = arrays['genomes'][arrays['genome_index']]
+    world.alive[:count] = True
+    world.grid[arrays['x'], arrays['y']] = np.arange(count, dtype=np.int32)
+    world.size = count
+
+
+def load_world(path, engine=None, chunk_size=None, workers=None):
+    """Загружает мир из снимка.
+
+    engine: 'objects' (World), 'array' (ArrayWorld) или None — по умолчанию World.
+    chunk_size: размер чанка сетки World; None — как в снимке.
+    workers: число процессов ArrayWorld; с ним загружается ParallelArrayWorld."""
+    # Импорт здесь: world и array_world сами импортируют этот модуль
+    from world import World
+    from array_world import ArrayWorld
+    from parallel_world import ParallelArrayWorld
+
+    header, arrays = read_snapshot(path)
+    config = SimulationConfig.from_dict(header['config'])
+    # В снимках без next_clan_id новые кланы нумеруются после существующих
+    next_clan_id = header.get('next_clan_id', int(arrays['clan_id'].max(initial=0)) + 1)
+    if engine == 'array':
+        if workers:
+            world = ParallelArrayWorld(header['width'], header['height'], config=config, workers=workers)
+        else:
+            world = ArrayWorld(header['width'], header['height'], config=config)
+        world.tick = header['tick']
+        _restore_array_world(world, arrays)
+        world.births = header['births']
+        world.deaths = header['deaths']
+        world.next_clan_id = next_clan_id
+    else:
+        if chunk_size is None:
+            chunk_size = header.get('chunk_size')
+        world = World(header['width'], header['height'], config=config, chunk_size=chunk_size)
+        world.tick = header['tick']
+        _restore_object_world(world, arrays)
+        world.stats.births = header['births']
+        world.stats.deaths = header['deaths']
+        world.lineage.next_clan_id = next_clan_id
+
+    world.rng.set_state(header['rng'])
+    return world
\ No newline at end of file
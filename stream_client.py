@@ -0,0 +1,97 @@
+"""Окно зрителя трансляции (streaming.StreamServer) с другой машины или процесса.
+
+Сообщения читает фоновый поток, а окно применяет их к RemoteWorld и
+рисует её так же, как main.py рисует мир: буфером пикселей или через
+камеру, с режимами отображения панели управления.
+"""
+import argparse
+import collections
+import socket
+import threading
+
+import pygame
+
+from camera import Camera
+from config import *
+from renderer import CameraRenderer, PixelRenderer
+from settings_ui import ControlPanel
+from streaming import DEFAULT_PORT, RemoteWorld, read_messages
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Watch a simulation streamed by batch.py --stream.')
+    parser.add_argument('--host', default='127.0.0.1', help='stream server host')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='stream server port')
+    return parser.parse_args()
+
+
+def receive(sock, messages):
+    for message in read_messages(sock):
+        messages.append(message)
+    messages.append(None)
+
+
+def main():
+    args = parse_args()
+    sock = socket.create_connection((args.host, args.port))
+    messages = collections.deque()
+    threading.Thread(target=receive, args=(sock, messages), name='receive', daemon=True).start()
+
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    clock = pygame.time.Clock()
+    pygame.display.set_caption(f'simulation stream {args.host}:{args.port}')
+    control_panel = ControlPanel(width=200)
+    control_panel.disable_tick_controls('stream')
+    game_rect = pygame.Rect(control_panel.width, 0, WINDOW_WIDTH - control_panel.width, WINDOW_HEIGHT)
+    game_surface = screen.subsurface(game_rect)
+
+    world = RemoteWorld()
+    renderer = None
+    camera = None
+    running = True
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif camera is not None and event.type == pygame.MOUSEWHEEL:
+                mouse_x, mouse_y = pygame.mouse.get_pos()
+                if mouse_x > control_panel.width:
+                    camera.zoom_at(1.25 ** event.y, mouse_x - control_panel.width, mouse_y)
+            elif camera is not None and event.type == pygame.MOUSEMOTION and event.buttons[2]:
+                camera.pan(*event.rel)
+            else:
+                control_panel.handle_event(event)
+
+        while messages:
+            message = messages.popleft()
+            if message is None:
+                pygame.display.set_caption('simulation stream (disconnected)')
+                continue
+            world.apply(*message)
+
+        if world.tick is not None:
+            if renderer is None:
+                # Размер мира известен из первого снимка
+                if world.width * BLOCK_SIZE <= game_rect.width and world.height * BLOCK_SIZE <= game_rect.height:
+                    renderer = PixelRenderer(world.width, world.height)
+                else:
+                    camera = Camera(game_rect.width, game_rect.height, world.width, world.height, zoom=BLOCK_SIZE)
+                    renderer = CameraRenderer()
+            control_panel.update_stats(world)
+            if camera is not None:
+                renderer.draw(world, game_surface, control_panel, camera)
+            else:
+                renderer.draw(world, game_surface, control_panel)
+
+        control_panel.draw(screen)
+        pygame.display.flip()
+        clock.tick(control_panel.fps)
+
+    sock.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
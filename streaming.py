@@ -0,0 +1,410 @@
+"""Трансляция состояния мира по сети удалённым зрителям.
+
+Сервер (StreamServer) работает в своём потоке с циклом asyncio и
+принимает TCP-подключения. Новый зритель получает снимок — все занятые
+клетки поля, — а дальше изменения: клетки, у которых с прошлого
+сообщения поменялись занятость, тип, клан, направление или градация
+энергии (рождения, гибель, ходы, повороты). Трафик поэтому растёт с
+активностью мира, а не с его размером.
+
+Мир отдаёт изменения вызовом publish(world) после тика. Этот вызов
+только собирает изменившиеся клетки в массив и кладёт его в общий
+буфер; сжатие и отправка идут в потоке сервера. Зритель, не
+успевающий читать, получает изменения за несколько тиков одним
+сообщением, а если их накопилось больше, чем клеток в снимке, — новый
+снимок. Тик никогда не ждёт сети.
+
+Каждое сообщение — заголовок FRAME (длина, вид) и сжатое zlib тело:
+строка JSON с тиком, размерами мира и счётчиками популяции, затем
+записи SQUARE.
+"""
+import asyncio
+import json
+import socket
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+from cell_type import CellType
+from config import ENERGY_BUCKETS, SimulationConfig
+from population_stats import PopulationStats
+
+DEFAULT_PORT = 7878
+# Запись об одной клетке поля; kind — тип клетки + 1, 0 — клетка опустела
+SQUARE = np.dtype([('x', '<i4'), ('y', '<i4'), ('kind', 'i1'), ('direction', 'i1'),
+                   ('energy', 'u1'), ('clan_id', '<i8')])
+FRAME = struct.Struct('<IB')
+SNAPSHOT = 0
+DELTA = 1
+# Не чаще одного сообщения зрителю за столько секунд; изменения между ними сливаются
+SEND_INTERVAL = 1 / 30
+# Сколько необработанных тиков копится до сервера, прежде чем тик заменит их запросом снимка
+MAX_OUTBOX = 256
+COMPRESSION_LEVEL = 1
+
+
+def squares_from_state(state, config):
+    """Записи SQUARE для клеток из массивов состояния."""
+    squares = np.zeros(len(state['x']), dtype=SQUARE)
+    squares['x'] = state['x']
+    squares['y'] = state['y']
+    squares['kind'] = state['cell_type'] + 1
+    squares['direction'] = state['direction']
+    max_energy = np.array([config.max_energy(cell_type) for cell_type in CellType], dtype=np.float64)
+    buckets = state['energy'] * ENERGY_BUCKETS / max_energy[state['cell_type']]
+    squares['energy'] = np.clip(buckets, 0, ENERGY_BUCKETS - 1)
+    squares['clan_id'] = state['clan_id']
+    return squares
+
+
+def merge_squares(parts):
+    """Сливает записи нескольких тиков: для каждой клетки поля остаётся последняя."""
+    if len(parts) == 1:
+        return parts[0]
+    squares = np.concatenate(parts)
+    # np.unique берёт первое вхождение, поэтому ищем по перевёрнутому массиву
+    reverse = squares[::-1]
+    keys = reverse['x'].astype(np.int64) << 32 | reverse['y'].astype(np.int64)
+    _, first = np.unique(keys, return_index=True)
+    return reverse[first]
+
+
+def encode_message(kind, header, squares):
+    body = zlib.compress(json.dumps(header).encode() + b'\n' + squares.tobytes(), COMPRESSION_LEVEL)
+    return FRAME.pack(len(body), kind) + body
+
+
+def decode_body(body):
+    data = zlib.decompress(body)
+    end = data.index(b'\n')
+    return json.loads(data[:end]), np.frombuffer(data[end + 1:], dtype=SQUARE)
+
+
+class DirtyBlockDeltas:
+    """Изменения World по его множеству world.dirty_blocks — за O(изменений).
+
+    Пока зрителей нет, отслеживание выключено и тик за него не платит."""
+
+    def __init__(self, world):
+        if world.dirty_blocks is not None:
+            raise ValueError('world.dirty_blocks is already tracked by another consumer')
+        self.world = world
+
+    def collect(self):
+        world = self.world
+        if world.dirty_blocks is None:
+            # Отслеживание только включилось; зрители всё равно начнут со снимка
+            world.dirty_blocks = set()
+            return np.zeros(0, dtype=SQUARE)
+        max_energy = world.config.max_energy
+        rows = []
+        for block in world.dirty_blocks:
+            cell = block.cell
+            if cell is None:
+                rows.append((block.x, block.y, 0, 0, 0, 0))
+            else:
+                bucket = int(cell.energy * ENERGY_BUCKETS / max_energy(cell.cell_type))
+                rows.append((block.x, block.y, cell.cell_type.value + 1, cell.direction,
+                             min(max(bucket, 0), ENERGY_BUCKETS - 1), cell.clan_id))
+        world.dirty_blocks.clear()
+        return np.array(rows, dtype=SQUARE)
+
+    def reset(self):
+        self.world.dirty_blocks = None
+
+
+class GridDeltas:
+    """Изменения мира без событий (ArrayWorld): сравнение с клетками прошлого тика.
+
+    Клетки хранятся отсортированными по номеру клетки поля (x * height + y),
+    и прошлый тик сопоставляется с текущим поиском по этим номерам — работа
+    зависит от числа клеток, а не от площади поля."""
+
+    def __init__(self, world):
+        self.world = world
+        self.previous_keys = None
+        self.previous = None
+
+    def collect(self):
+        world = self.world
+        squares = squares_from_state(world.state_arrays(), world.config)
+        keys = squares['x'].astype(np.int64) * world.height + squares['y']
+        order = np.argsort(keys)
+        keys = keys[order]
+        squares = squares[order]
+        previous_keys, previous = self.previous_keys, self.previous
+        self.previous_keys, self.previous = keys, squares
+        if previous is None:
+            return squares
+
+        # Занятые сейчас клетки, которых не было или которые изменились
+        position = np.minimum(np.searchsorted(previous_keys, keys), max(len(previous_keys) - 1, 0))
+        if len(previous_keys):
+            changed = (previous_keys[position] != keys) | (previous[position] != squares)
+        else:
+            changed = np.ones(len(keys), dtype=bool)
+        # Опустевшие клетки: были в прошлом тике, а сейчас их нет
+        position = np.minimum(np.searchsorted(keys, previous_keys), max(len(keys) - 1, 0))
+        vacated = previous_keys[keys[position] != previous_keys] if len(keys) else previous_keys
+        emptied = np.zeros(len(vacated), dtype=SQUARE)
+        emptied['x'] = vacated // world.height
+        emptied['y'] = vacated % world.height
+        return np.concatenate([squares[changed], emptied])
+
+    def reset(self):
+        self.previous_keys = None
+        self.previous = None
+
+
+class Viewer:
+    """Подключённый зритель: очередь ещё не отправленных тиков."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.pending = []
+        self.pending_squares = 0
+        self.needs_snapshot = True
+        self.ready = asyncio.Event()
+        self.task = asyncio.current_task()
+
+
+class StreamServer:
+    """TCP-сервер трансляции; world — мир, о котором будет вызываться publish."""
+
+    def __init__(self, world, host='127.0.0.1', port=DEFAULT_PORT, interval=SEND_INTERVAL):
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.deltas = DirtyBlockDeltas(world) if hasattr(world, 'cells') else GridDeltas(world)
+        self.viewers = set()
+        self.sent_bytes = 0
+        self.error = None
+        self._lock = threading.Lock()
+        self._outbox = []
+        self._flush_scheduled = False
+        self._overflowed = False
+        self._snapshot_wanted = False
+        self._loop = None
+        self._server = None
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stream', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._started.wait()
+        if self.error is not None:
+            raise RuntimeError('stream server failed to start') from self.error
+        return self
+
+    def close(self):
+        if self._loop is not None and self.error is None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _shutdown(self):
+        self._server.close()
+        tasks = [viewer.task for viewer in self.viewers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def publish(self, world):
+        """Передаёт изменения мира за тик; вызывается потоком симуляции после world.update()."""
+        if not self.viewers:
+            # Без зрителей ничего не копится; следующий зритель начнёт со снимка
+            self.deltas.reset()
+            return
+        squares = self.deltas.collect()
+        header = {'tick': world.tick, 'stats': world.stats.summary()}
+        items = [(DELTA, header, squares)]
+        if self._snapshot_wanted:
+            self._snapshot_wanted = False
+            header = dict(header, width=world.width, height=world.height)
+            items.append((SNAPSHOT, header, squares_from_state(world.state_arrays(), world.config)))
+        with self._lock:
+            if len(self._outbox) >= MAX_OUTBOX:
+                # Сервер не успевает разбирать тики: очередь сбрасывается, зрители получат снимок
+                self._outbox = []
+                self._overflowed = True
+            self._outbox.extend(items)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self._loop.call_soon_threadsafe(self._flush)
+
+    def _run(self):
+        try:
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._serve, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except Exception as error:
+            self.error = error
+            self._started.set()
+            return
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    def _flush(self):
+        """Раздаёт накопленные тики зрителям (в потоке сервера)."""
+        with self._lock:
+            outbox = self._outbox
+            overflowed = self._overflowed
+            self._outbox = []
+            self._flush_scheduled = False
+            self._overflowed = False
+        if overflowed:
+            self._snapshot_wanted = True
+            for viewer in self.viewers:
+                viewer.pending = []
+                viewer.pending_squares = 0
+                viewer.needs_snapshot = True
+        for kind, header, squares in outbox:
+            for viewer in self.viewers:
+                if kind == SNAPSHOT:
+                    if viewer.needs_snapshot and not viewer.pending:
+                        viewer.pending = [(kind, header, squares)]
+                        viewer.pending_squares = len(squares)
+                        viewer.needs_snapshot = False
+                    continue
+                if viewer.needs_snapshot:
+                    continue
+                viewer.pending.append((kind, header, squares))
+                viewer.pending_squares += len(squares)
+                if viewer.pending_squares > max(header['stats']['total'], 1):
+                    # Снимок выйдет короче накопленных изменений
+                    viewer.pending = []
+                    viewer.pending_squares = 0
+                    viewer.needs_snapshot = True
+                    self._snapshot_wanted = True
+                viewer.ready.set()
+            if kind == SNAPSHOT:
+                for viewer in self.viewers:
+                    if viewer.pending:
+                        viewer.ready.set()
+
+    async def _serve(self, reader, writer):
+        viewer = Viewer(writer)
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.viewers.add(viewer)
+        self._snapshot_wanted = True
+        try:
+            while True:
+                await viewer.ready.wait()
+                viewer.ready.clear()
+                if viewer.needs_snapshot or not viewer.pending:
+                    continue
+                pending = viewer.pending
+                viewer.pending = []
+                viewer.pending_squares = 0
+                kind = pending[0][0]
+                message = encode_message(kind, self._header(pending), merge_squares([item[2] for item in pending]))
+                writer.write(message)
+                self.sent_bytes += len(message)
+                await writer.drain()
+                await asyncio.sleep(self.interval)
+        except (ConnectionError, OSError, asyncio.CancelledError):
+            pass
+        finally:
+            self.viewers.discard(viewer)
+            writer.close()
+
+    @staticmethod
+    def _header(pending):
+        # Снимок со следующими за ним изменениями остаётся снимком
+        header = dict(pending[-1][1])
+        for key in ('width', 'height'):
+            if key in pending[0][1]:
+                header[key] = pending[0][1][key]
+        return header
+
+
+class RemoteWorld:
+    """Копия мира на стороне зрителя, собранная из сообщений StreamServer.
+
+    Отдаёт то же, что WorldView, поэтому её рисуют PixelRenderer и
+    CameraRenderer, а ControlPanel показывает по ней статистику. Энергия
+    известна с точностью до градации цвета."""
+
+    def __init__(self, config=None):
+        self.config = config if config is not None else SimulationConfig()
+        self.max_energy = np.array([self.config.max_energy(cell_type) for cell_type in CellType], dtype=np.float64)
+        self.width = 0
+        self.height = 0
+        self.tick = None
+        self.stats = PopulationStats()
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.squares = np.zeros(0, dtype=SQUARE)
+
+    def apply(self, kind, header, squares):
+        """Применяет сообщение; изменения до первого снимка пропускаются."""
+        if kind == SNAPSHOT:
+            self.width = header['width']
+            self.height = header['height']
+            self.keys = np.zeros(0, dtype=np.int64)
+            self.squares = np.zeros(0, dtype=SQUARE)
+        elif self.tick is None:
+            return
+        keys = squares['x'].astype(np.int64) * self.height + squares['y']
+        keep = ~np.isin(self.keys, keys)
+        occupied = squares['kind'] > 0
+        keys = np.concatenate([self.keys[keep], keys[occupied]])
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.squares = np.concatenate([self.squares[keep], squares[occupied]])[order]
+        self.tick = header['tick']
+        self.stats = self._stats(header['stats'])
+
+    def _stats(self, summary):
+        stats = PopulationStats()
+        stats.type_counts = [summary['types'][cell_type.name] for cell_type in CellType]
+        stats.total_energy = summary['total_energy']
+        stats.age_buckets = summary['age_buckets']
+        stats.tick_births = summary['births']
+        stats.tick_deaths = summary['deaths']
+        clans, sizes = np.unique(self.squares['clan_id'], return_counts=True)
+        stats.clan_sizes = dict(zip(clans.tolist(), sizes.tolist()))
+        return stats
+
+    def state_arrays(self):
+        squares = self.squares
+        cell_type = squares['kind'] - 1
+        return {
+            'x': squares['x'],
+            'y': squares['y'],
+            'direction': squares['direction'],
+            'cell_type': cell_type,
+            'clan_id': squares['clan_id'],
+            'energy': (squares['energy'] + 0.5) / ENERGY_BUCKETS * self.max_energy[cell_type],
+        }
+
+    def __len__(self):
+        return len(self.squares)
+
+
+def read_messages(sock):
+    """Сообщения сервера из подключённого сокета: (вид, заголовок, записи)."""
+    stream = sock.makefile('rb')
+    while True:
+        frame = stream.read(FRAME.size)
+        if len(frame) < FRAME.size:
+            return
+        length, kind = FRAME.unpack(frame)
+        body = stream.read(length)
+        if len(body) < length:
+            return
+        header, squares = decode_body(body)
+        yield kind, header, squares
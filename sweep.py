@@ -0,0 +1,195 @@
+"""Перебор параметров симуляции на всех ядрах.
+
+Каждая комбинация значений SimulationConfig и seed прогоняется как
+отдельный мир без графики в пуле процессов. Итоги прогонов дописываются
+в файл результатов по одной JSON-строке; при повторном запуске уже
+посчитанные комбинации пропускаются.
+
+    python sweep.py --grid movement_cost=4,8,12 --grid photosynthesis_energy=8,10 --seeds 4
+    python sweep.py --random reproduction_threshold=200:500 --samples 50 --seeds 2
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from array_world import ArrayWorld
+from batch import populate
+from cell_type import CellType
+from config import *
+from world import World
+
+
+def parse_values(text):
+    """Разбирает значение параметра: целое, если возможно, иначе float."""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_grid(items):
+    grid = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        grid[name] = [parse_values(value) for value in values.split(',')]
+    return grid
+
+
+def parse_ranges(items):
+    ranges = {}
+    for item in items:
+        name, _, bounds = item.partition('=')
+        low, _, high = bounds.partition(':')
+        ranges[name] = (parse_values(low), parse_values(high))
+    return ranges
+
+
+def make_combinations(grid, ranges, samples, sample_seed):
+    """Все сочетания значений сетки, умноженные на samples случайных точек диапазонов."""
+    names = sorted(grid)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    if not ranges:
+        return combinations
+
+    sampler = random.Random(sample_seed)
+    sampled = []
+    for combination in combinations:
+        for _ in range(samples):
+            params = dict(combination)
+            for name, (low, high) in sorted(ranges.items()):
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = sampler.randint(low, high)
+                else:
+                    params[name] = sampler.uniform(low, high)
+            sampled.append(params)
+    return sampled
+
+
+def run_key(job):
+    """Ключ прогона для пропуска уже посчитанных комбинаций."""
+    return json.dumps({name: job[name] for name in ('params', 'seed', 'ticks', 'sample_every', 'width', 'height',
+                                                      'photosynthetic', 'predators', 'engine')},
+                      sort_keys=True)
+
+
+def run_one(job):
+    """Прогоняет одну комбинацию и возвращает сводку. Выполняется в процессе пула."""
+    config = SimulationConfig().replace(**job['params'])
+    world_class = ArrayWorld if job['engine'] == 'array' else World
+    world = world_class(job['width'], job['height'], seed=job['seed'], config=config)
+    populate(world, job['photosynthetic'], job['predators'])
+
+    extinction_tick = None
+    type_extinction = {cell_type.name: None for cell_type in CellType}
+    curve = []
+    start = time.perf_counter()
+    for tick in range(job['ticks']):
+        world.update()
+        stats = world.stats
+        if tick % job['sample_every'] == 0:
+            curve.append(stats.total)
+        for cell_type in CellType:
+            if type_extinction[cell_type.name] is None and stats.count(cell_type) == 0:
+                type_extinction[cell_type.name] = world.tick
+        if stats.total == 0:
+            extinction_tick = world.tick
+            break
+    elapsed = time.perf_counter() - start
+
+    stats = world.stats
+    return {
+        'key': job['key'],
+        'params': job['params'],
+        'seed': job['seed'],
+        'ticks': world.tick,
+        'extinction_tick': extinction_tick,
+        'type_extinction_tick': type_extinction,
+        'population_curve': curve,
+        'sample_every': job['sample_every'],
+        'final': {cell_type.name: stats.count(cell_type) for cell_type in CellType},
+        'clans': stats.clan_count,
+        'elapsed': elapsed,
+    }
+
+
+def load_done(path):
+    """Ключи прогонов, уже записанных в файл результатов."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as file:
+        for line in file:
+            try:
+                done.add(json.loads(line)['key'])
+            except (ValueError, KeyError):
+                continue  # Оборванная последняя строка после прерванного запуска
+    return done
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Parameter sweep over SimulationConfig values.')
+    parser.add_argument('--grid', action='append', default=[], metavar='NAME=V1,V2',
+                        help='values of a config parameter to try (repeatable)')
+    parser.add_argument('--random', action='append', default=[], metavar='NAME=LOW:HIGH',
+                        help='range of a config parameter to sample (repeatable)')
+    parser.add_argument('--samples', type=int, default=10, help='random samples per grid point')
+    parser.add_argument('--sample-seed', type=int, default=0, help='seed of the parameter sampler')
+    parser.add_argument('--seeds', type=int, default=1, help='world seeds 0..N-1 per combination')
+    parser.add_argument('--ticks', type=int, default=5000, help='ticks per run')
+    parser.add_argument('--sample-every', type=int, default=100, help='population curve resolution in ticks')
+    parser.add_argument('--width', type=int, default=PLAYGROUND_WIDTH // BLOCK_SIZE, help='grid width in blocks')
+    parser.add_argument('--height', type=int, default=PLAYGROUND_HEIGHT // BLOCK_SIZE, help='grid height in blocks')
+    parser.add_argument('--photosynthetic', type=int, default=3000, help='initial photosynthetic cells')
+    parser.add_argument('--predators', type=int, default=800, help='initial predator cells')
+    parser.add_argument('--engine', choices=('objects', 'array'), default='objects')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--output', default='sweep_results.ndjson', help='results file (appended)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    combinations = make_combinations(parse_grid(args.grid), parse_ranges(args.random),
+                                     args.samples, args.sample_seed)
+    # Проверяем имена параметров до запуска пула
+    for params in combinations:
+        SimulationConfig.from_dict(params)
+
+    done = load_done(args.output)
+    jobs = []
+    for params in combinations:
+        for seed in range(args.seeds):
+            job = {
+                'params': params,
+                'seed': seed,
+                'ticks': args.ticks,
+                'sample_every': args.sample_every,
+                'width': args.width,
+                'height': args.height,
+                'photosynthetic': args.photosynthetic,
+                'predators': args.predators,
+                'engine': args.engine,
+            }
+            job['key'] = run_key(job)
+            if job['key'] not in done:
+                # Совпавшие случайные точки считаются один раз
+                done.add(job['key'])
+                jobs.append(job)
+
+    print(f'{len(jobs)} runs to do')
+    with open(args.output, 'a') as output, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_one, job) for job in jobs]
+        for finished, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            print(f'[{finished}/{len(jobs)}] {result["params"]} seed={result["seed"]} '
+                  f'extinction={result["extinction_tick"]} final={result["final"]}')
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
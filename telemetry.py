@@ -0,0 +1,122 @@
+"""Потоковая запись метрик популяции по тикам.
+
+Мир передаёт в TelemetrySink свои счётчики в конце тика (world.telemetry).
+Тик только собирает небольшой словарь и кладёт его в ограниченную очередь;
+сериализацию и запись в файлы NDJSON делает фоновый поток. Если диск не
+успевает и очередь заполнена, запись пропускается и учитывается в
+dropped — тик никогда не ждёт ввода-вывода.
+
+Файлы пишутся только дописыванием и ротируются по числу записей:
+run.00000.ndjson, run.00001.ndjson, ... read_telemetry() собирает их
+обратно в столбцы NumPy.
+"""
+import glob
+import json
+import queue
+import threading
+
+import numpy as np
+
+# Ограничение очереди между тиком и потоком записи, записей
+QUEUE_SIZE = 65536
+# Записей в одном файле до ротации
+RECORDS_PER_FILE = 1_000_000
+TOP_CLANS = 5
+
+
+def file_name(prefix, index):
+    return f'{prefix}.{index:05d}.ndjson'
+
+
+class TelemetrySink:
+    def __init__(self, prefix, every=1, records_per_file=RECORDS_PER_FILE, queue_size=QUEUE_SIZE):
+        self.prefix = prefix
+        self.every = every
+        self.records_per_file = records_per_file
+        self.dropped = 0
+        self.written = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(target=self._write, name='telemetry', daemon=True)
+        self._writer.start()
+
+    def record(self, world):
+        """Снимает метрики мира после тика, если тик попадает в шаг every."""
+        if world.tick % self.every:
+            return
+        stats = world.stats
+        record = stats.summary()
+        record['tick'] = world.tick
+        record['births_total'] = stats.births
+        record['deaths_total'] = stats.deaths
+        record['top_clans'] = stats.top_clans(TOP_CLANS)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Дописывает очередь и закрывает файл."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+        self._writer.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write(self):
+        # Повторный запуск с тем же префиксом продолжает серию новым файлом
+        index = len(telemetry_files(self.prefix))
+        lines = 0
+        output = None
+        try:
+            output = open(file_name(self.prefix, index), 'a')
+            while True:
+                record = self._queue.get()
+                if record is None:
+                    break
+                if lines >= self.records_per_file:
+                    output.close()
+                    index += 1
+                    lines = 0
+                    output = open(file_name(self.prefix, index), 'a')
+                output.write(json.dumps(record, separators=(',', ':')))
+                output.write('\n')
+                lines += 1
+                self.written += 1
+        except Exception as error:
+            # Ошибку записи или сериализации отдаём в close(), остаток очереди
+            # выбрасываем, чтобы close() не ждал места в полной очереди
+            self.error = error
+            while self._queue.get() is not None:
+                pass
+        finally:
+            if output is not None:
+                output.close()
+
+
+def telemetry_files(prefix):
+    return sorted(glob.glob(glob.escape(prefix) + '.[0-9][0-9][0-9][0-9][0-9].ndjson'))
+
+
+def read_telemetry(prefix):
+    """Все записи серии файлов prefix.*.ndjson в виде столбцов.
+
+    Числовые поля (и поля словаря types) становятся массивами NumPy,
+    остальные (age_buckets, top_clans) — списками."""
+    columns = {}
+    for path in telemetry_files(prefix):
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                for name, count in record.pop('types').items():
+                    columns.setdefault(name, []).append(count)
+                for name, value in record.items():
+                    columns.setdefault(name, []).append(value)
+    return {name: np.array(values) if values and isinstance(values[0], (int, float)) else values
+            for name, values in columns.items()}
@@ -1,63 +1,287 @@
-import pygame
+import contextlib
+import gc
+import time
+from itertools import islice
+
+import numpy as np
 
-from block import Block
 from cell import Cell, CellType
 from config import *
+from genome_registry import GenomeRegistry
+from lineage import LineageTracker
+from grid import ChunkedGrid, DenseGrid
+from population_stats import PopulationStats
+from profiler import TickProfiler
+from seeding import plan_population
+from snapshot import load_world, save_world
+from world_random import WorldRandom
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    """Сборщик циклов на миллионе новых объектов без циклических ссылок только
+    многократно обходит растущую кучу, поэтому массовое создание клеток идёт без него."""
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if collecting:
+            gc.enable()
+
 
 class World:
-    def __init__(self, width, height):
+    def __init__(self, width, height, seed=None, config=None, chunk_size=None):
         self.width = width
         self.height = height
-        self.blocks = [[Block(x, y) for y in range(self.height)] for x in range(self.width)]
+        self.config = config if config is not None else SimulationConfig()
+        # Все случайные решения мира берутся из его генератора: seed определяет прогон
+        self.rng = WorldRandom(seed)
+        # Блоки создаются все сразу или, с chunk_size, по чанкам только там, где есть клетки
+        # В тороидальном мире край поля смыкается с противоположным, стен нет
+        toroidal = self.config.toroidal
+        if chunk_size is None:
+            self.grid = DenseGrid(width, height, toroidal)
+        else:
+            self.grid = ChunkedGrid(width, height, chunk_size, toroidal)
+        # Клетка хранит свой индекс в self.cells. Удалённая клетка оставляет
+        # на своём месте None, а список уплотняется в конце тика.
         self.cells = []
+        self.removed_count = 0
+        self.updating = False
+        self.genomes = GenomeRegistry()
+        # Родословная видов; она же выдаёт идентификаторы кланов
+        self.lineage = LineageTracker()
+        self.stats = PopulationStats()
+        self.tick = 0
+        # Блоки, изменившиеся с прошлой отрисовки; None — изменения не отслеживаются
+        self.dirty_blocks = None
+        # Сводки по плиткам для отрисовки издалека (lod.TileAggregates) или None
+        self.tiles = None
+        # Обработчики действий клеток по индексу Action; профилировщик подменяет их обёртками
+        self.actions = Cell._ACTIONS
+        self.profiler = None
+        # Приёмник метрик по тикам (telemetry.TelemetrySink) или None
+        self.telemetry = None
 
     def add_cell(self, x, y, cell_type=CellType.PHOTOSYNTHETIC):
-        if self.is_valid_position(x, y) and self.get_block(x, y).is_empty():
-            cell = Cell(self.get_block(x, y), cell_type=cell_type)
-            self.cells.append(cell)
-            return cell
+        if self.is_valid_position(x, y) and self.grid.cell_at(x, y) is None:
+            return self.spawn_cell(self.grid.block(x, y), cell_type=cell_type)
         return None
 
+    def spawn_cell(self, block, genome=None, cell_type=CellType.PHOTOSYNTHETIC, clan_id=None,
+                   energy=None, birth=False, parent=None):
+        """Создаёт клетку в пустом блоке и добавляет её в конец списка клеток.
+
+        birth отмечает рождение потомка, а не заселение мира; parent — клетка-родитель,
+        если геном потомка мутировал, в родословной появляется новый вид."""
+        cell = Cell(self, block, genome, cell_type, clan_id)
+        self.grid.occupy(block)
+        self.lineage.add(cell.genome_id, parent.genome_id if parent is not None else None, cell.clan_id, self.tick)
+        if energy is not None:
+            cell.energy = energy
+        if self.tiles is not None:
+            self.tiles.add(cell)
+        cell.index = len(self.cells)
+        self.cells.append(cell)
+        self.stats.add(cell, birth)
+        self.mark_dirty(block)
+        return cell
+
+    def populate(self, counts=None, density=None, genomes=None):
+        """Массово заселяет мир без коллизий; возвращает число созданных клеток.
+
+        counts — {CellType: число клеток}, density — {CellType: доля клеток поля},
+        genomes — пул геномов (матрица (N, 64), список bytes, {CellType: пул},
+        seeding.population_pool) или None для случайных геномов.
+
+        Места, направления и геномы разыгрываются массивами, но объекты Cell
+        создаются по одному: миллион клеток — порядка десяти секунд, быстрое
+        заселение таких масштабов есть только у ArrayWorld."""
+        seeds = plan_population(self, counts, density, genomes)
+        clan_ids = seeds['founder'] + self.lineage.reserve_clans(seeds['founders'])
+        with _gc_paused():
+            genome_ids = self.genomes.intern_many(seeds['genomes'], seeds['cell_type'])
+            self._place_cells(seeds['x'], seeds['y'], seeds['cell_type'], genome_ids, seeds['direction'], clan_ids)
+        self.stats.add_many(seeds['cell_type'], np.full(len(genome_ids), self.config.cell_energy_start), clan_ids)
+        return len(genome_ids)
+
+    def _place_cells(self, xs, ys, cell_types, genome_ids, directions, clan_ids):
+        """Создаёт клетки в свободных блоках по массивам; геномы уже интернированы.
+
+        Счётчики популяции не трогает — это дело вызывающего."""
+        kinds = list(CellType)
+        grid = self.grid
+        lineage = self.lineage
+        cells = self.cells
+        rows = zip(xs.tolist(), ys.tolist(), cell_types.tolist(), genome_ids, directions.tolist(), clan_ids.tolist())
+        for x, y, value, genome_id, direction, clan_id in rows:
+            block = grid.block(x, y)
+            cell = Cell.seeded(self, block, genome_id, kinds[value], clan_id, direction)
+            grid.occupy(block)
+            lineage.add(genome_id, None, clan_id, self.tick)
+            if self.tiles is not None:
+                self.tiles.add(cell)
+            cell.index = len(cells)
+            cells.append(cell)
+            self.mark_dirty(block)
+
+    def restore_cells(self, columns, genomes, genome_index):
+        """Массово создаёт клетки из снимка, минуя проверки add_cell.
+
+        columns — массивы по именам snapshot.CELL_COLUMNS, genomes — таблица
+        геномов (G, 64), genome_index — номер генома каждой клетки. Каждая пара
+        (геном, тип клетки) интернируется и компилируется один раз."""
+        cell_type = columns['cell_type']
+        pairs, inverse, carriers = np.unique(genome_index.astype(np.int64) * len(CellType) + cell_type,
+                                             return_inverse=True, return_counts=True)
+        start = len(self.cells)
+        with _gc_paused():
+            pair_ids = self.genomes.intern_many(genomes[pairs // len(CellType)], pairs % len(CellType))
+            for genome_id, count in zip(pair_ids, carriers.tolist()):
+                if count > 1:
+                    self.genomes.acquire(genome_id, count - 1)
+            genome_ids = np.array(pair_ids, dtype=np.int64)[inverse.ravel()].tolist()
+            self._place_cells(columns['x'], columns['y'], cell_type, genome_ids, columns['direction'],
+                              columns['clan_id'])
+            rows = zip(islice(self.cells, start, None), columns['energy'].tolist(), columns['age'].tolist(),
+                       columns['genome_step'].tolist())
+            for cell, energy, age, genome_step in rows:
+                cell.energy = energy
+                cell.age = age
+                cell.genome_step = genome_step
+        self.stats.add_many(cell_type, columns['energy'], columns['clan_id'], columns['age'])
+
+    def save(self, path):
+        save_world(self, path)
+
+    @staticmethod
+    def load(path):
+        return load_world(path, engine='objects')
+
+    def enable_profiling(self):
+        """Включает замер времени по действиям клеток и возвращает профилировщик."""
+        if self.profiler is None:
+            self.profiler = TickProfiler()
+            self.actions = self.profiler.wrap_actions(Cell._ACTIONS)
+            # Замер удаления клеток (и умерших, и съеденных) — через атрибут экземпляра
+            self.remove_cell = self.profiler.timed('REMOVE', self.remove_cell)
+        return self.profiler
+
+    def disable_profiling(self):
+        if self.profiler is not None:
+            self.profiler = None
+            self.actions = Cell._ACTIONS
+            del self.remove_cell
+
+    def move_cell(self, cell, block):
+        """Перемещает клетку в пустой блок."""
+        old_block = cell.block
+        old_block.cell = None
+        cell.block = block
+        block.cell = cell
+        self.grid.occupy(block)
+        self.grid.vacate(old_block)
+        if self.tiles is not None:
+            self.tiles.move(cell, old_block)
+        if self.dirty_blocks is not None:
+            self.dirty_blocks.add(old_block)
+            self.dirty_blocks.add(block)
+
+    def mark_dirty(self, block):
+        if self.dirty_blocks is not None:
+            self.dirty_blocks.add(block)
+
+    def mark_energy(self, cell):
+        """Помечает блок клетки, если её энергия перешла в другую цветовую градацию."""
+        bucket = int(cell.energy * ENERGY_BUCKETS / cell.max_energy)
+        if bucket != cell.energy_bucket:
+            cell.energy_bucket = bucket
+            self.dirty_blocks.add(cell.block)
+
+    def __len__(self):
+        return len(self.cells) - self.removed_count
+
+    def count_types(self):
+        return {cell_type: self.stats.count(cell_type) for cell_type in CellType}
+
+    def state_arrays(self):
+        """Состояние клеток в виде параллельных массивов NumPy, как в ArrayWorld."""
+        cells = [cell for cell in self.cells if cell is not None]
+        count = len(cells)
+        return {
+            'x': np.fromiter((cell.block.x for cell in cells), dtype=np.int32, count=count),
+            'y': np.fromiter((cell.block.y for cell in cells), dtype=np.int32, count=count),
+            'energy': np.fromiter((cell.energy for cell in cells), dtype=np.float64, count=count),
+            'age': np.fromiter((cell.age for cell in cells), dtype=np.int32, count=count),
+            'direction': np.fromiter((cell.direction for cell in cells), dtype=np.int8, count=count),
+            'genome_step': np.fromiter((cell.genome_step for cell in cells), dtype=np.uint8, count=count),
+            'cell_type': np.fromiter((cell.cell_type.value for cell in cells), dtype=np.int8, count=count),
+            'clan_id': np.fromiter((cell.clan_id for cell in cells), dtype=np.int64, count=count),
+        }
+
     def update(self):
-        # Копируем список, чтобы избежать проблем при изменении списка во время итерации
-        cells_to_update = self.cells.copy()
-        for cell in cells_to_update:
+        # Клетки, родившиеся в этом тике, добавляются в конец списка и ходят со следующего тика
+        profiler = self.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+        self.stats.begin_tick()
+        self.updating = True
+        for cell in islice(self.cells, len(self.cells)):
+            if cell is None:
+                continue
             if cell.energy <= 0:
                 self.remove_cell(cell)
                 continue
             cell.process_action(self)
+        self.updating = False
+        self._compact()
+        self.tick += 1
+        if self.telemetry is not None:
+            self.telemetry.record(self)
+        if profiler is not None:
+            profiler.end_tick(self, time.perf_counter() - start)
 
     def remove_cell(self, cell):
-        if cell in self.cells:
-            cell.block.cell = None
-            self.cells.remove(cell)
+        if cell.index is None:
+            return
+        cell.block.cell = None
+        self.grid.vacate(cell.block)
+        if self.tiles is not None:
+            self.tiles.remove(cell)
+        self.mark_dirty(cell.block)
+        self.cells[cell.index] = None
+        cell.index = None
+        self.removed_count += 1
+        if self.genomes.release(cell.genome_id):
+            self.lineage.extinct(cell.genome_id, self.tick)
+        self.stats.remove(cell)
+        if not self.updating:
+            self._compact()
 
+    def _compact(self):
+        """Убирает освободившиеся места из списка клеток, сохраняя порядок."""
+        if not self.removed_count:
+            return
+        cells = [cell for cell in self.cells if cell is not None]
+        for index, cell in enumerate(cells):
+            cell.index = index
+        self.cells = cells
+        self.removed_count = 0
 
     def draw(self, surface, settings=None):
-        surface.fill((0, 0, 0))
-        block_size = BLOCK_SIZE  # Используем константу из config
-        for x in range(self.width):
-            for y in range(self.height):
-                block = self.blocks[x][y]
-                # Обновляем позицию отрисовки блока
-                block.rect = pygame.Rect(
-                    x * block_size,
-                    y * block_size,
-                    block_size,
-                    block_size
-                )
-                if block.cell and settings:
-                    original_color = block.cell.color
-                    block.cell.color = settings.get_cell_color(block.cell)
-                    block.draw(surface)
-                    block.cell.color = original_color
-                else:
-                    block.draw(surface)
+        # pygame импортируется только при отрисовке, ядро симуляции от него не зависит
+        from renderer import draw_world
+        draw_world(self, surface, settings)
 
     def get_block(self, x, y):
         if self.is_valid_position(x, y):
-            return self.blocks[x][y]
+            return self.grid.block(x, y)
         return None
 
+    def cell_at(self, x, y):
+        """Клетка в блоке (x, y) или None; координаты должны быть в пределах мира."""
+        return self.grid.cell_at(x, y)
+
     def is_valid_position(self, x, y):
         return 0 <= x < self.width and 0 <= y < self.height
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""Генератор случайных чисел мира.
+
+У каждого мира свой генератор, поэтому seed полностью определяет прогон.
+Числа берутся из NumPy блоками и выдаются из буфера: одиночный вызов
+обходится дешевле, чем вызов функции модуля random.
+"""
+import numpy as np
+
+from genome_program import GENOME_LENGTH
+
+# Сколько значений вытягивается из генератора за один раз
+DRAW_BATCH = 4096
+
+
+class _Buffer:
+    """Выдаёт по одному значения, заранее вытянутые блоком."""
+
+    def __init__(self, draw):
+        self._draw = draw
+        self._values = []
+        self._index = 0
+
+    def get_state(self):
+        return self._values[self._index:]
+
+    def set_state(self, values):
+        self._values = list(values)
+        self._index = 0
+
+    def next(self):
+        if self._index == len(self._values):
+            self._values = self._draw().tolist()
+            self._index = 0
+        value = self._values[self._index]
+        self._index += 1
+        return value
+
+
+class WorldRandom:
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.generator = np.random.default_rng(seed)
+        generator = self.generator
+        self._floats = _Buffer(lambda: generator.random(DRAW_BATCH))
+        self._genes = _Buffer(lambda: generator.integers(1, GENOME_LENGTH + 1, DRAW_BATCH, dtype=np.uint8))
+        self._steps = _Buffer(lambda: generator.integers(0, GENOME_LENGTH, DRAW_BATCH, dtype=np.uint8))
+        self._directions = _Buffer(lambda: generator.integers(0, 8, DRAW_BATCH, dtype=np.uint8))
+        self._genomes = None
+        self._genome_index = 0
+
+    def _buffers(self):
+        return {
+            'floats': self._floats,
+            'genes': self._genes,
+            'steps': self._steps,
+            'directions': self._directions,
+        }
+
+    def get_state(self):
+        """Состояние генератора вместе с невыданными значениями буферов (для JSON)."""
+        genomes = self._genomes[self._genome_index:] if self._genomes is not None else np.empty((0, GENOME_LENGTH), np.uint8)
+        return {
+            'seed': self.seed,
+            'generator': self.generator.bit_generator.state,
+            'buffers': {name: buffer.get_state() for name, buffer in self._buffers().items()},
+            'genomes': genomes.tobytes().hex(),
+        }
+
+    def set_state(self, state):
+        self.seed = state['seed']
+        self.generator.bit_generator.state = state['generator']
+        for name, buffer in self._buffers().items():
+            buffer.set_state(state['buffers'][name])
+        self._genomes = np.frombuffer(bytes.fromhex(state['genomes']), dtype=np.uint8).reshape(-1, GENOME_LENGTH)
+        self._genome_index = 0
+
+    def random(self):
+        """Число из [0, 1)."""
+        return self._floats.next()
+
+    def gene(self):
+        """Значение гена из [1, 64]."""
+        return self._genes.next()
+
+    def genome_step(self):
+        """Позиция в геноме из [0, 63]."""
+        return self._steps.next()
+
+    def direction(self):
+        """Номер направления из [0, 7]."""
+        return self._directions.next()
+
+    def genome(self):
+        """Случайный геном в виде bytes; геномы вытягиваются блоком в матрицу."""
+        if self._genomes is None or self._genome_index >= len(self._genomes):
+            self._genomes = self.genomes(DRAW_BATCH // 16)
+            self._genome_index = 0
+        genome = self._genomes[self._genome_index].tobytes()
+        self._genome_index += 1
+        return genome
+
+    def genomes(self, count):
+        """Матрица (count, 64) случайных геномов."""
+        return self.generator.integers(1, GENOME_LENGTH + 1, size=(count, GENOME_LENGTH), dtype=np.uint8)
+
+    def directions(self, count):
+        return self.generator.integers(0, 8, size=count, dtype=np.int8)
\ No newline at end of file